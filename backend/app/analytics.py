@@ -0,0 +1,149 @@
+"""Shared aggregate queries behind the dashboard and pillar endpoints."""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import Date, Integer, and_, case, cast, func, select
+from sqlalchemy.orm import Session
+
+from . import models
+
+Youth = models.Youth
+
+HIGH_POTENTIAL_SCORE = 80
+HIGH_RISK_SCORE = 50
+
+GRANULARITIES = ("day", "week", "month")
+
+
+def _dialect(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+
+def days_between(db: Session, start, end):
+    """Whole days from start to end, like (end - start).days in Python."""
+    if _dialect(db) == "sqlite":
+        return cast(func.julianday(end) - func.julianday(start), Integer)
+    return func.floor(func.extract("epoch", end - start) / 86400)
+
+
+def youth_overview(db: Session) -> Dict:
+    """All youth counters and the average onboarding duration in one statement."""
+    enrolled = Youth.onboarding_status == models.OnboardingStatusEnum.ENROLLED.value
+    dropped = Youth.onboarding_status == models.OnboardingStatusEnum.DROPPED.value
+    onboarded = and_(enrolled, Youth.enrolled_date.isnot(None), Youth.created_at.isnot(None))
+
+    row = db.execute(select(
+        func.count(Youth.id).label("total"),
+        func.count(case((enrolled, 1))).label("enrolled"),
+        func.count(case((dropped, 1))).label("dropped"),
+        func.count(case((Youth.scout_score >= HIGH_POTENTIAL_SCORE, 1))).label("high_potential"),
+        func.count(case((and_(enrolled, Youth.dropout_risk >= HIGH_RISK_SCORE), 1))).label("high_risk"),
+        func.avg(case((onboarded, days_between(db, Youth.created_at, Youth.enrolled_date))))
+            .label("avg_onboarding_days"),
+        select(func.count(models.Placement.id)).scalar_subquery().label("placements"),
+    )).one()
+
+    return {
+        "total": row.total,
+        "enrolled": row.enrolled,
+        "dropped": row.dropped,
+        "high_potential": row.high_potential,
+        "high_risk": row.high_risk,
+        "avg_onboarding_days": float(row.avg_onboarding_days or 0),
+        "placements": row.placements,
+    }
+
+
+def top_enrolled_channel(db: Session) -> Optional[str]:
+    row = db.execute(
+        select(Youth.source_channel)
+        .where(Youth.onboarding_status == models.OnboardingStatusEnum.ENROLLED.value)
+        .group_by(Youth.source_channel)
+        .order_by(func.count(Youth.id).desc())
+        .limit(1)
+    ).first()
+    return row[0] if row else None
+
+
+def bucket_start(value: date, granularity: str) -> date:
+    if granularity == "week":
+        return value - timedelta(days=value.weekday())
+    if granularity == "month":
+        return value.replace(day=1)
+    return value
+
+
+def next_bucket(value: date, granularity: str) -> date:
+    if granularity == "week":
+        return value + timedelta(weeks=1)
+    if granularity == "month":
+        return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return value + timedelta(days=1)
+
+
+def bucket_expression(db: Session, column, granularity: str):
+    """SQL expression mapping a timestamp to the first day of its bucket (weeks start on Monday)."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Invalid granularity. Must be one of: {list(GRANULARITIES)}")
+    if _dialect(db) == "sqlite":
+        if granularity == "week":
+            return func.date(column, "weekday 0", "-6 days")
+        if granularity == "month":
+            return func.strftime("%Y-%m-01", column)
+        return func.date(column)
+    return cast(func.date_trunc(granularity, column), Date)
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def bucket_counts(
+    db: Session,
+    column,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    granularity: str = "day",
+    group_by=None
+) -> Dict:
+    """COUNT(*) of youth rows per time bucket of ``column`` in one grouped query.
+
+    ``start`` and ``end`` are inclusive days; either may be left open. Keys
+    are bucket start dates, or (bucket, group value) pairs with ``group_by``.
+    """
+    bucket = bucket_expression(db, column, granularity)
+    columns = [bucket, func.count(Youth.id)]
+    if group_by is not None:
+        columns.insert(1, group_by)
+
+    query = select(*columns).where(column.isnot(None))
+    if start is not None:
+        query = query.where(column >= datetime.combine(start, datetime.min.time()))
+    if end is not None:
+        query = query.where(column < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    query = query.group_by(*columns[:-1])
+
+    if group_by is None:
+        return {_as_date(row[0]): row[1] for row in db.execute(query)}
+    return {(_as_date(row[0]), row[1]): row[2] for row in db.execute(query)}
+
+
+def youth_time_series(db: Session, start: date, end: date, granularity: str = "day") -> List[Dict]:
+    """New-candidate and enrollment counts per bucket between start and end, zero-filled."""
+    new_candidates = bucket_counts(db, Youth.created_at, start, end, granularity)
+    enrolled = bucket_counts(db, Youth.enrolled_date, start, end, granularity)
+
+    series = []
+    current = bucket_start(start, granularity)
+    while current <= end:
+        series.append({
+            "date": current.isoformat(),
+            "new_candidates": new_candidates.get(current, 0),
+            "enrolled": enrolled.get(current, 0)
+        })
+        current = next_bucket(current, granularity)
+    return series
@@ -0,0 +1,258 @@
+"""Response cache for the read-heavy analytics endpoints.
+
+Endpoints opt in with the ``response_cache.cached`` decorator, giving a
+namespace, a TTL and the tables (tags) their result depends on. Any
+committed ORM write to one of those tables drops the dependent entries;
+set-based writes that bypass the ORM flush call
+``response_cache.invalidate(...)`` themselves.
+
+The default backend is an in-process LRU. Set CACHE_BACKEND=redis (and
+CACHE_REDIS_URL) to share entries and invalidations between workers.
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_DEFAULT_TTL = int(os.getenv("CACHE_DEFAULT_TTL", "30"))
+
+_MISSING = object()
+
+
+class LRUCacheBackend:
+    name = "memory"
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, set] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()):
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, set()):
+                    if key in self._entries:
+                        self._remove(key)
+                        removed += 1
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCacheBackend:
+    """Stores JSON-encoded values; a Redis set per tag lists the keys to drop."""
+    name = "redis"
+
+    def __init__(self, url: str = CACHE_REDIS_URL, prefix: str = "pathfinder:cache:"):
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(self.prefix + key)
+        return _MISSING if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()):
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, json.dumps(value, default=str), ex=ttl)
+        for tag in tags:
+            pipe.sadd(f"{self.prefix}tag:{tag}", self.prefix + key)
+        pipe.execute()
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            keys = self.client.smembers(tag_key)
+            pipe = self.client.pipeline()
+            if keys:
+                pipe.delete(*keys)
+            pipe.delete(tag_key)
+            results = pipe.execute()
+            if keys:
+                removed += results[0]
+        return removed
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def size(self) -> int:
+        return sum(1 for key in self.client.scan_iter(match=f"{self.prefix}*") if b":tag:" not in key)
+
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+
+    def cached(self, namespace: str, ttl: Optional[int] = None, tags: Iterable[str] = ("youth",)):
+        ttl = ttl or CACHE_DEFAULT_TTL
+        tags = tuple(tags)
+
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = self._make_key(namespace, signature, args, kwargs)
+                try:
+                    value = self.backend.get(key)
+                except Exception as e:
+                    print(f"[Cache] Read failed for {namespace}: {e}")
+                    value = _MISSING
+                if value is not _MISSING:
+                    self._record(namespace, "hits")
+                    return value
+
+                self._record(namespace, "misses")
+                value = func(*args, **kwargs)
+                try:
+                    self.backend.set(key, value, ttl, tags)
+                except Exception as e:
+                    print(f"[Cache] Write failed for {namespace}: {e}")
+                return value
+
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, *tags: str) -> int:
+        try:
+            return self.backend.invalidate_tags(tags)
+        except Exception as e:
+            print(f"[Cache] Invalidation failed for {tags}: {e}")
+            return 0
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            endpoints = {
+                namespace: {
+                    **counts,
+                    "hit_rate": round(counts["hits"] / (counts["hits"] + counts["misses"]), 4)
+                    if counts["hits"] + counts["misses"] else 0.0
+                }
+                for namespace, counts in self._stats.items()
+            }
+        hits = sum(e["hits"] for e in endpoints.values())
+        misses = sum(e["misses"] for e in endpoints.values())
+        try:
+            entries = self.backend.size()
+        except Exception:
+            entries = None
+        return {
+            "backend": self.backend.name,
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "endpoints": endpoints
+        }
+
+    def _record(self, namespace: str, outcome: str):
+        with self._stats_lock:
+            counts = self._stats.setdefault(namespace, {"hits": 0, "misses": 0})
+            counts[outcome] += 1
+
+    @staticmethod
+    def _make_key(namespace: str, signature: inspect.Signature, args, kwargs) -> str:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        params = {
+            name: value for name, value in bound.arguments.items()
+            if not isinstance(value, Session)
+        }
+        return f"{namespace}:{json.dumps(params, sort_keys=True, default=str)}"
+
+
+def _create_backend():
+    if CACHE_BACKEND == "redis":
+        if REDIS_AVAILABLE:
+            print(f"[Cache] Using Redis backend at {CACHE_REDIS_URL}")
+            return RedisCacheBackend()
+        print("[Cache] redis library not installed - using in-process LRU cache")
+    return LRUCacheBackend()
+
+
+response_cache = ResponseCache(_create_backend())
+
+
+_TAGS_KEY = "cache_invalidation_tags"
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_cache_tags(session, flush_context, instances):
+    tags = session.info.setdefault(_TAGS_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            tags.add(table)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_tags(session):
+    tags = session.info.pop(_TAGS_KEY, None)
+    if tags:
+        response_cache.invalidate(*tags)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_cache_tags(session, previous_transaction):
+    session.info.pop(_TAGS_KEY, None)
@@ -1,13 +1,148 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import Dict
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./pathfinder.db")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Pool settings (ignored by SQLite, which keeps SQLAlchemy's defaults)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+
+# WAL lets readers run alongside the single writer and, with busy_timeout,
+# makes concurrent writers (several uvicorn workers) wait instead of
+# failing with "database is locked". synchronous=NORMAL is safe under WAL.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+}
+
+# Async drivers for the same database, used by the async def handlers
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.database in (None, "", ":memory:") or "mode=memory" in str(url)
+
+
+def engine_options(url: str) -> Dict:
+    """create_engine keyword arguments with per-dialect defaults."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+
+    if backend == "sqlite":
+        if url.get_driver_name() == "aiosqlite":
+            options = {"connect_args": {"timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000}}
+            # aiosqlite defaults to NullPool (a new connection per session)
+            if not _is_memory_sqlite(url):
+                options["poolclass"] = AsyncAdaptedQueuePool
+            return options
+        return {"connect_args": {"check_same_thread": False, "timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000}}
+
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+    if backend == "postgresql" and DB_STATEMENT_TIMEOUT_MS:
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def _apply_sqlite_pragmas(engine: Engine):
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_db_engine(url: str) -> Engine:
+    engine = create_engine(url, **engine_options(url))
+    if engine.dialect.name == "sqlite" and not _is_memory_sqlite(engine.url):
+        _apply_sqlite_pragmas(engine)
+    return engine
+
+
+def create_async_db_engine(url: str):
+    engine = create_async_engine(url, **engine_options(url))
+    if engine.dialect.name == "sqlite" and not _is_memory_sqlite(engine.url):
+        _apply_sqlite_pragmas(engine.sync_engine)
+    return engine
+
+
+# INSERT constructs that support ON CONFLICT, for upserts
+UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def upsert_insert(dialect_name: str, table):
+    """insert(table) with on_conflict_do_update()/on_conflict_do_nothing() for the dialect."""
+    construct = UPSERT_INSERTS.get(dialect_name)
+    if construct is None:
+        raise ValueError(f"No upsert support for {dialect_name}")
+    return construct(table)
+
+
+def pool_stats(engine: Engine) -> Dict:
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    return stats
+
+
+def pool_metrics() -> Dict:
+    return {
+        "dialect": engine.dialect.name,
+        "sync": pool_stats(engine),
+        "async": pool_stats(async_engine.sync_engine),
+        "sqlite_pragmas": SQLITE_PRAGMAS if engine.dialect.name == "sqlite" else None,
+    }
+
+
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = create_async_db_engine(ASYNC_DATABASE_URL)
+# expire_on_commit=False: attribute access after commit would otherwise need
+# an implicit (blocking) refresh, which async sessions cannot do
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def get_db():
     db = SessionLocal()
@@ -17,6 +152,64 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# DateTime columns that keyset pagination compares against bound datetimes
+NORMALIZED_SQLITE_DATETIMES = [("youth", "created_at")]
+
+
 def init_db():
-    from . import models
+    from . import models, status_counts
     Base.metadata.create_all(bind=engine)
+    ensure_indexes()
+    normalize_sqlite_datetimes()
+    with engine.begin() as conn:
+        status_counts.seed(conn)
+
+
+def normalize_sqlite_datetimes(bind=None):
+    """Rewrite CURRENT_TIMESTAMP-style values ("YYYY-MM-DD HH:MM:SS") in the
+    format SQLAlchemy binds datetimes with, so text comparisons line up.
+
+    Rows inserted through server_default=func.now() lack the microseconds.
+    """
+    bind = bind or engine
+    if bind.dialect.name != "sqlite":
+        return
+    existing_tables = set(inspect(bind).get_table_names())
+    with bind.begin() as conn:
+        for table, column in NORMALIZED_SQLITE_DATETIMES:
+            if table not in existing_tables:
+                continue
+            updated = conn.exec_driver_sql(
+                f"UPDATE {table} SET {column} = {column} || '.000000' "
+                f"WHERE length({column}) = 19"
+            ).rowcount
+            if updated:
+                print(f"[DB] Normalized {updated} {table}.{column} values")
+
+
+def ensure_indexes(bind=None):
+    """Create indexes declared on the models that an existing database lacks.
+
+    create_all() only creates indexes together with new tables, so databases
+    created before an index was added are upgraded here.
+    """
+    bind = bind or engine
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=bind)
+                created.append(index.name)
+    if created:
+        print(f"[DB] Created indexes: {', '.join(created)}")
+    return created
@@ -0,0 +1,143 @@
+"""Preview and archival derivatives of uploaded document images.
+
+For every image in the document store, build_derivatives writes two files
+next to the original:
+
+- <sha256>.preview.webp (JPEG if this Pillow has no WebP support): at most
+  DOCUMENT_PREVIEW_MAX_PX on the long edge. The review screens load this.
+- <sha256>.archive.jpg: at most DOCUMENT_ARCHIVE_MAX_PX, re-encoded as a
+  progressive JPEG. It is kept only when it is smaller than the original.
+
+The paths are recorded on the document_blobs row. Derivatives are keyed
+by content just like the original, so a duplicate upload never
+reprocesses, and the GC sweep removes them together with their blob.
+PDFs are marked "skipped". Without Pillow nothing is generated and
+documents are served as uploaded.
+"""
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from sqlalchemy import select, update
+
+from .database import SessionLocal
+from . import models
+from .document_store import blob_path
+
+try:
+    from PIL import Image, ImageOps, features
+    PILLOW_AVAILABLE = True
+    WEBP_AVAILABLE = features.check("webp")
+except ImportError:
+    PILLOW_AVAILABLE = False
+    WEBP_AVAILABLE = False
+    print("[Documents] Pillow not installed - previews disabled")
+
+DOCUMENT_PREVIEW_MAX_PX = int(os.getenv("DOCUMENT_PREVIEW_MAX_PX", "480"))
+DOCUMENT_PREVIEW_QUALITY = int(os.getenv("DOCUMENT_PREVIEW_QUALITY", "70"))
+DOCUMENT_ARCHIVE_MAX_PX = int(os.getenv("DOCUMENT_ARCHIVE_MAX_PX", "2000"))
+DOCUMENT_ARCHIVE_QUALITY = int(os.getenv("DOCUMENT_ARCHIVE_QUALITY", "85"))
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+PREVIEW_EXT = ".preview.webp" if WEBP_AVAILABLE else ".preview.jpg"
+ARCHIVE_EXT = ".archive.jpg"
+
+Blob = models.DocumentBlob
+
+
+def _load(path: Path, max_px: int) -> "Image.Image":
+    image = Image.open(path)
+    # JPEG decoders can downscale by 1/2..1/8 while decoding, far cheaper than a full decode
+    image.draft("RGB", (max_px, max_px))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "L"):
+        rgba = image.convert("RGBA")
+        image = Image.new("RGB", image.size, "white")
+        image.paste(rgba, mask=rgba.getchannel("A"))
+    image.thumbnail((max_px, max_px), Image.LANCZOS)
+    return image
+
+
+def _save(image: "Image.Image", dest: Path, quality: int):
+    """Write via a temp file so readers never see a partial derivative."""
+    tmp = dest.with_name(dest.name + ".part")
+    if dest.suffix == ".webp":
+        image.save(tmp, "WEBP", quality=quality, method=4)
+    else:
+        image.save(tmp, "JPEG", quality=quality, optimize=True, progressive=True)
+    os.replace(tmp, dest)
+
+
+def render_derivatives(source: Path, sha256: str) -> Dict[str, Optional[str]]:
+    # Decode once at archive size and downscale that for the preview
+    image = _load(source, DOCUMENT_ARCHIVE_MAX_PX)
+
+    archive = source.with_name(sha256 + ARCHIVE_EXT)
+    _save(image, archive, DOCUMENT_ARCHIVE_QUALITY)
+    if archive.stat().st_size >= source.stat().st_size:
+        # Re-encoding did not help; the original is the archival copy
+        archive.unlink()
+        archive = None
+
+    preview = source.with_name(sha256 + PREVIEW_EXT)
+    image.thumbnail((DOCUMENT_PREVIEW_MAX_PX, DOCUMENT_PREVIEW_MAX_PX), Image.LANCZOS)
+    _save(image, preview, DOCUMENT_PREVIEW_QUALITY)
+
+    return {"preview_path": str(preview), "archive_path": str(archive) if archive else None}
+
+
+def build_derivatives(sha256: str) -> Optional[str]:
+    """Generate derivatives for one blob if still pending; returns the resulting status."""
+    db = SessionLocal()
+    try:
+        blob = db.get(Blob, sha256)
+        if blob is None or blob.derivatives_status not in (None, "pending"):
+            return blob.derivatives_status if blob else None
+
+        values: Dict[str, Optional[str]] = {}
+        if blob.ext not in IMAGE_EXTENSIONS:
+            values["derivatives_status"] = "skipped"
+        elif not PILLOW_AVAILABLE:
+            return "pending"
+        else:
+            try:
+                values = render_derivatives(blob_path(blob.sha256, blob.ext), blob.sha256)
+                values["derivatives_status"] = "ready"
+            except Exception as e:
+                print(f"[Documents] Could not build previews for {sha256[:12]}: {e}")
+                values["derivatives_status"] = "failed"
+
+        db.execute(update(Blob).where(Blob.sha256 == sha256).values(**values))
+        db.commit()
+        return values["derivatives_status"]
+    finally:
+        db.close()
+
+
+def build_pending(limit: Optional[int] = None) -> Dict[str, int]:
+    """Backfill derivatives for blobs stored before previews existed."""
+    db = SessionLocal()
+    try:
+        query = select(Blob.sha256).where(Blob.derivatives_status.is_(None) | (Blob.derivatives_status == "pending"))
+        pending = list(db.scalars(query.limit(limit) if limit else query))
+    finally:
+        db.close()
+
+    summary: Dict[str, int] = {}
+    for sha256 in pending:
+        status = build_derivatives(sha256)
+        summary[status] = summary.get(status, 0) + 1
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .database import init_db
+
+    parser = argparse.ArgumentParser(description="Build previews and archival copies for stored document images")
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    init_db()
+    print(f"[Documents] Derivatives: {build_pending(limit=args.limit)}")
@@ -0,0 +1,276 @@
+"""Content-addressed storage for uploaded documents.
+
+Every document is stored once under uploads/objects/<ab>/<cd>/<sha256><ext>,
+keyed by the SHA-256 of its content, which is computed while the upload
+is copied. Re-uploading identical bytes, whether from a retry or from
+another youth, reuses the existing file.
+
+document_blobs keeps one row per stored file. Its ref_count is the
+number of Youth document columns (DOCUMENT_COLUMNS) that point at the
+file, and it is adjusted in the same transaction as the column change.
+collect_garbage() re-derives the counts from those columns. It deletes
+blobs that nothing references, plus files that never got a row (for
+example from a failed commit), once they are older than
+DOCUMENT_GC_GRACE_SECONDS.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from sqlalchemy import delete, exists, func, or_, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal, upsert_insert
+from . import models
+
+UPLOAD_DIR = Path(__file__).resolve().parent.parent / "uploads"
+OBJECTS_DIR = UPLOAD_DIR / "objects"
+STAGING_DIR = OBJECTS_DIR / "tmp"
+STAGING_DIR.mkdir(parents=True, exist_ok=True)
+
+COPY_CHUNK_SIZE = 64 * 1024
+DOCUMENT_GC_GRACE_SECONDS = int(os.getenv("DOCUMENT_GC_GRACE_SECONDS", "3600"))
+DOCUMENT_GC_INTERVAL_SECONDS = int(os.getenv("DOCUMENT_GC_INTERVAL_SECONDS", "3600"))
+
+DOCUMENT_COLUMNS = [
+    models.Youth.aadhar_doc_path,
+    models.Youth.pan_doc_path,
+    models.Youth.bpl_doc_path,
+    models.Youth.photo_path,
+    models.Youth.cert_10th_path,
+    models.Youth.cert_12th_path,
+    models.Youth.cert_graduation_path,
+    models.Youth.cert_other_path,
+]
+
+Blob = models.DocumentBlob
+
+
+class DocumentTooLarge(ValueError):
+    pass
+
+
+class StagedDocument:
+    """An upload copied to the staging area and hashed, not yet in the store."""
+
+    def __init__(self, tmp_path: str, sha256: str, size: int, ext: str):
+        self.tmp_path = tmp_path
+        self.sha256 = sha256
+        self.size = size
+        self.ext = ext
+
+    @property
+    def path(self) -> Path:
+        return blob_path(self.sha256, self.ext)
+
+
+def blob_path(sha256: str, ext: str) -> Path:
+    return OBJECTS_DIR / sha256[:2] / sha256[2:4] / f"{sha256}{ext}"
+
+
+def blob_sha(path: Optional[str]) -> Optional[str]:
+    """The content hash if path points into the store, else None (legacy per-type uploads)."""
+    if not path:
+        return None
+    p = Path(path)
+    if p.parent.parent.parent != OBJECTS_DIR:
+        return None
+    return p.stem if len(p.stem) == 64 else None
+
+
+def stage(src: BinaryIO, ext: str, max_size: int) -> StagedDocument:
+    """Copy src into the staging area in chunks, hashing as it goes."""
+    fd, tmp_path = tempfile.mkstemp(dir=STAGING_DIR, suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = src.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise DocumentTooLarge(f"Document exceeds {max_size} bytes")
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return StagedDocument(tmp_path, digest.hexdigest(), size, ext)
+
+
+def discard(staged: StagedDocument):
+    if os.path.exists(staged.tmp_path):
+        os.unlink(staged.tmp_path)
+
+
+def _place(staged: StagedDocument) -> bool:
+    """Move the staged file into the store; returns True if the content was already there."""
+    target = staged.path
+    if target.exists():
+        os.unlink(staged.tmp_path)
+        # Refresh mtime so a concurrent sweep treats the file as recently used
+        os.utime(target)
+        return True
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(staged.tmp_path, target)
+    return False
+
+
+async def put(db: AsyncSession, staged: StagedDocument) -> Tuple[str, bool]:
+    """Store a staged document and take a reference to it in db's transaction.
+
+    Returns the stored path and whether identical content was already stored.
+    """
+    insert = upsert_insert(db.get_bind().dialect.name, Blob)
+    stmt = insert.values(sha256=staged.sha256, ext=staged.ext, size=staged.size, ref_count=1)
+    # One statement whether the row exists, is inserted concurrently, or was
+    # just collected by the GC (which unlinks before committing, so this waits)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Blob.sha256],
+        set_={"ref_count": Blob.ref_count + 1, "updated_at": func.now()}
+    ).returning(Blob.ext)
+    # Same bytes under another extension (.jpg vs .jpeg) share the first file
+    staged.ext = await db.scalar(stmt)
+
+    # Placed only once the reference is held, so the GC cannot remove the file under it
+    duplicate = await asyncio.to_thread(_place, staged)
+    return str(staged.path), duplicate
+
+
+async def release(db: AsyncSession, path: Optional[str]) -> bool:
+    """Drop one reference to a stored document. False for paths outside the store."""
+    sha = blob_sha(path)
+    if sha is None:
+        return False
+    await db.execute(
+        update(Blob)
+        .where(Blob.sha256 == sha, Blob.ref_count > 0)
+        .values(ref_count=Blob.ref_count - 1)
+    )
+    return True
+
+
+def _unlink(path: Path):
+    """Delete a stored file and its shard directories once they are empty."""
+    path.unlink(missing_ok=True)
+    for directory in (path.parent, path.parent.parent):
+        try:
+            directory.rmdir()
+        except OSError:
+            break
+
+
+def _referenced(path: str):
+    return exists().where(or_(*(column == path for column in DOCUMENT_COLUMNS)))
+
+
+def reconcile_ref_counts(db: Session) -> int:
+    """Recount references from the youth document columns; returns how many counts were wrong."""
+    paths = union_all(*(
+        select(column.label("path")).where(column.like(f"{OBJECTS_DIR}%"))
+        for column in DOCUMENT_COLUMNS
+    )).subquery()
+    actual: Dict[str, int] = {}
+    for path, count in db.execute(select(paths.c.path, func.count()).group_by(paths.c.path)):
+        sha = blob_sha(path)
+        if sha is not None:
+            actual[sha] = actual.get(sha, 0) + count
+
+    fixes = [
+        {"sha256": sha, "ref_count": actual.get(sha, 0)}
+        for sha, ref_count in db.execute(select(Blob.sha256, Blob.ref_count))
+        if ref_count != actual.get(sha, 0)
+    ]
+    if fixes:
+        db.execute(update(Blob), fixes)
+    db.commit()
+    return len(fixes)
+
+
+def collect_garbage(db: Session, grace_seconds: int = DOCUMENT_GC_GRACE_SECONDS) -> Dict:
+    started = time.perf_counter()
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    cutoff_ts = time.time() - grace_seconds
+    summary = {"recounted": reconcile_ref_counts(db), "blobs_deleted": 0, "orphans_deleted": 0, "bytes_freed": 0}
+
+    candidates = db.execute(
+        select(Blob.sha256, Blob.ext, Blob.size)
+        .where(Blob.ref_count <= 0, Blob.updated_at < cutoff)
+    ).all()
+    for sha, ext, size in candidates:
+        path = blob_path(sha, ext)
+        # Re-check against the columns so an upload committed since the recount keeps its file
+        deleted = db.execute(
+            delete(Blob)
+            .where(Blob.sha256 == sha, Blob.ref_count <= 0, ~_referenced(str(path)))
+        ).rowcount
+        if deleted:
+            # The original plus any previews derived from it. Unlinked before
+            # the commit: a concurrent put() waits on the deleted row, then
+            # re-inserts it and places its own copy of the file.
+            for stored in path.parent.glob(f"{sha}.*"):
+                _unlink(stored)
+            summary["blobs_deleted"] += 1
+            summary["bytes_freed"] += size
+        db.commit()
+
+    # Files with no row: staging leftovers and blobs whose transaction rolled back
+    known = set(db.scalars(select(Blob.sha256)))
+    for path in OBJECTS_DIR.glob("*/*/*"):
+        if path.name[:64] in known:
+            continue
+        stat = path.stat()
+        if stat.st_mtime < cutoff_ts and not db.scalar(select(_referenced(str(path)))):
+            _unlink(path)
+            summary["orphans_deleted"] += 1
+            summary["bytes_freed"] += stat.st_size
+    for path in STAGING_DIR.iterdir():
+        if path.stat().st_mtime < cutoff_ts:
+            path.unlink()
+
+    summary["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def collect_garbage_now() -> Dict:
+    db = SessionLocal()
+    try:
+        return collect_garbage(db)
+    finally:
+        db.close()
+
+
+async def run_periodic_gc(interval: int = DOCUMENT_GC_INTERVAL_SECONDS):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            summary = await asyncio.to_thread(collect_garbage_now)
+            if summary["blobs_deleted"] or summary["orphans_deleted"]:
+                print(f"[DocumentStore] GC: {summary}")
+        except Exception as e:
+            print(f"[DocumentStore] GC failed: {e}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .database import init_db
+
+    parser = argparse.ArgumentParser(description="Delete unreferenced documents from the upload store")
+    parser.add_argument("--grace-seconds", type=int, default=DOCUMENT_GC_GRACE_SECONDS)
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        print(f"[DocumentStore] GC: {collect_garbage(db, grace_seconds=args.grace_seconds)}")
+    finally:
+        db.close()
@@ -0,0 +1,132 @@
+"""Buffered writer for engagement_logs.
+
+Message and chat handlers append rows to an in-memory buffer instead of
+committing one row per event. The buffer is written with a single
+executemany INSERT once it holds ENGAGEMENT_LOG_BATCH_SIZE rows, every
+ENGAGEMENT_LOG_FLUSH_SECONDS, and on shutdown. Rows therefore show up in
+engagement_logs a few seconds late, and a hard crash loses at most one
+buffer of log rows. A batch the database rejects (a constraint or data
+error) is retried row by row so only the offending rows are dropped;
+other failures, such as a locked or unreachable database, put the batch
+back in the buffer for the next flush.
+"""
+import asyncio
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from .database import SessionLocal
+from . import models
+
+ENGAGEMENT_LOG_BATCH_SIZE = int(os.getenv("ENGAGEMENT_LOG_BATCH_SIZE", "500"))
+ENGAGEMENT_LOG_FLUSH_SECONDS = float(os.getenv("ENGAGEMENT_LOG_FLUSH_SECONDS", "2"))
+MAX_BUFFERED_ROWS = ENGAGEMENT_LOG_BATCH_SIZE * 20
+
+
+class EngagementLogWriter:
+    def __init__(self, batch_size: int = ENGAGEMENT_LOG_BATCH_SIZE, flush_interval: float = ENGAGEMENT_LOG_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.dropped = 0
+
+    def log(
+        self,
+        youth_id: int,
+        action: str,
+        channel: str = "whatsapp",
+        session_duration: int = 0,
+        sentiment: Optional[float] = None
+    ):
+        row = {
+            "youth_id": youth_id,
+            "action": action,
+            "channel": channel,
+            "session_duration": session_duration,
+            "sentiment": sentiment,
+            "created_at": datetime.utcnow(),
+        }
+        with self._lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._flush_soon()
+
+    def flush(self) -> int:
+        # One flush at a time keeps rows in insertion order
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+
+            db = SessionLocal()
+            try:
+                db.execute(insert(models.EngagementLog), rows)
+                db.commit()
+                return len(rows)
+            except (IntegrityError, DataError) as e:
+                db.rollback()
+                print(f"[EngagementLog] Batch of {len(rows)} rows rejected ({e.orig}) - writing row by row")
+                return self._write_each(db, rows)
+            except Exception as e:
+                db.rollback()
+                print(f"[EngagementLog] Failed to write {len(rows)} rows: {e}")
+                self._requeue(rows)
+                return 0
+            finally:
+                db.close()
+
+    def _write_each(self, db, rows: List[Dict]) -> int:
+        """Insert rows one at a time, dropping only those the database rejects."""
+        written = 0
+        for i, row in enumerate(rows):
+            try:
+                db.execute(insert(models.EngagementLog), [row])
+                db.commit()
+                written += 1
+            except (IntegrityError, DataError) as e:
+                db.rollback()
+                self.dropped += 1
+                print(f"[EngagementLog] Dropped row for youth {row['youth_id']} ({row['action']}): {e.orig}")
+            except Exception as e:
+                db.rollback()
+                print(f"[EngagementLog] Failed to write {len(rows) - i} rows: {e}")
+                self._requeue(rows[i:])
+                break
+        return written
+
+    def _requeue(self, rows: List[Dict]):
+        """Put rows back in front of the buffer for the next flush, e.g. while the database is down."""
+        with self._lock:
+            if len(self._buffer) + len(rows) <= MAX_BUFFERED_ROWS:
+                self._buffer[:0] = rows
+            else:
+                self.dropped += len(rows)
+                print(f"[EngagementLog] Buffer full - dropped {len(rows)} rows")
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    async def run_periodic_flush(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await asyncio.to_thread(self.flush)
+
+    def _flush_soon(self):
+        """Flush off the event loop when called from async handlers."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        loop.run_in_executor(None, self.flush)
+
+
+engagement_log = EngagementLogWriter()
@@ -0,0 +1,82 @@
+"""Streaming CSV / NDJSON export of youth rows.
+
+Rows are read with yield_per, which uses a server-side cursor where the
+driver supports one, and written out chunk by chunk, so memory stays
+constant regardless of the result size. The generator owns its session
+because request-scoped sessions are closed before a streamed body is sent.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterable, Iterator, List
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from .database import SessionLocal
+from . import models
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Same fields as schemas.Youth
+EXPORT_COLUMNS = [
+    "id", "name", "email", "phone", "age", "gender", "location",
+    "education_level", "income_bracket", "source_channel", "scout_score",
+    "dropout_risk", "onboarding_status", "profile_completed",
+    "enrolled_date", "created_at",
+]
+
+CHUNK_SIZE = 1000
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def iter_youth_rows(filters: Iterable, order_by: Iterable, fmt: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            select(*[getattr(models.Youth, c) for c in EXPORT_COLUMNS])
+            .where(*filters)
+            .order_by(*order_by)
+            .execution_options(yield_per=chunk_size)
+        )
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            for rows in result.partitions():
+                writer.writerows(
+                    [_json_value(v) if v is not None else "" for v in row] for row in rows
+                )
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+        else:
+            for rows in result.partitions():
+                yield "".join(
+                    json.dumps(dict(zip(EXPORT_COLUMNS, map(_json_value, row)))) + "\n"
+                    for row in rows
+                )
+    finally:
+        db.close()
+
+
+def export_youth(filters: List, order_by: List, fmt: str, filename: str) -> StreamingResponse:
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format. Must be one of: {list(EXPORT_FORMATS)}")
+
+    return StreamingResponse(
+        iter_youth_rows(filters, order_by, fmt),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
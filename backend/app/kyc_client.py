@@ -0,0 +1,261 @@
+"""Shared client for the Sandbox.co.in Aadhaar OKYC API.
+
+A single httpx.AsyncClient lives for the whole application, so KYC calls
+reuse pooled keep-alive connections instead of doing a TLS handshake per
+request. HTTP/2 is used when the h2 package is installed. Requests are
+retried with full-jitter backoff only when the upstream certainly did not
+act on them: connection failures, pool timeouts, 429 and 503. A read
+timeout on send-otp or verify-otp is not retried, because a retry could
+send a second SMS or consume the OTP. After KYC_BREAKER_FAILURES
+consecutive transient failures, a circuit breaker fails calls fast for
+KYC_BREAKER_RESET_SECONDS.
+
+KYC_BACKEND=stub swaps in StubBackend, an offline stand-in for load
+tests. It accepts the OTP KYC_STUB_OTP.
+"""
+import asyncio
+import itertools
+import os
+import random
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+SANDBOX_API_BASE = "https://api.sandbox.co.in"
+SANDBOX_API_KEY = os.getenv("SANDBOX_API_KEY", "key_live_127dbc12d8294d4ea054f95acba11732")
+SANDBOX_AUTH_KEY = os.getenv("SANDBOX_AUTH_KEY", "")
+
+KYC_BACKEND = os.getenv("KYC_BACKEND", "sandbox")
+KYC_CONNECT_TIMEOUT = float(os.getenv("KYC_CONNECT_TIMEOUT", "5"))
+KYC_READ_TIMEOUT = float(os.getenv("KYC_READ_TIMEOUT", "20"))
+KYC_MAX_CONNECTIONS = int(os.getenv("KYC_MAX_CONNECTIONS", "50"))
+KYC_MAX_RETRIES = int(os.getenv("KYC_MAX_RETRIES", "2"))
+KYC_BREAKER_FAILURES = int(os.getenv("KYC_BREAKER_FAILURES", "5"))
+KYC_BREAKER_RESET_SECONDS = float(os.getenv("KYC_BREAKER_RESET_SECONDS", "30"))
+KYC_STUB_LATENCY_MS = float(os.getenv("KYC_STUB_LATENCY_MS", "0"))
+KYC_STUB_OTP = os.getenv("KYC_STUB_OTP", "123456")
+
+RETRYABLE_STATUS_CODES = {429, 503}
+# Errors raised before the request reached the upstream
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class KYCUnavailable(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class KYCRequestFailed(Exception):
+    """The upstream answered with a non-200 status."""
+
+    def __init__(self, status_code: int, message: Optional[str]):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class CircuitBreaker:
+    """closed -> open after `failures` in a row -> half-open trial after `reset_seconds`."""
+
+    def __init__(self, failures: int = KYC_BREAKER_FAILURES, reset_seconds: float = KYC_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failures
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial_running):
+            retry_after = self.reset_seconds - (time.monotonic() - self._opened_at)
+            raise KYCUnavailable("KYC service unavailable: circuit open", retry_after=max(retry_after, 1))
+        if state == "half_open":
+            self._trial_running = True
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    def release_trial(self):
+        """The call was abandoned (e.g. the client disconnected); no verdict on the upstream."""
+        self._trial_running = False
+
+    def record_failure(self):
+        self._failures += 1
+        self._trial_running = False
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        return {"state": self.state, "consecutive_failures": self._failures}
+
+
+class SandboxBackend:
+    def __init__(self, base_url: str = SANDBOX_API_BASE):
+        self.base_url = base_url
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created on first use so it binds to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(KYC_READ_TIMEOUT, connect=KYC_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=KYC_MAX_CONNECTIONS,
+                    max_keepalive_connections=KYC_MAX_CONNECTIONS,
+                    keepalive_expiry=60
+                ),
+                headers={
+                    "x-api-key": SANDBOX_API_KEY,
+                    "x-api-version": "1.0",
+                    "Authorization": SANDBOX_AUTH_KEY,
+                }
+            )
+        return self._client
+
+    async def post(self, path: str, payload: Dict) -> Tuple[int, Dict]:
+        response = await self.client.post(path, json=payload)
+        try:
+            body = response.json() if response.content else {}
+        except ValueError:
+            body = {}
+        return response.status_code, body
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class StubBackend:
+    """Offline stand-in answering like the Sandbox OKYC endpoints."""
+
+    def __init__(self, latency_ms: float = KYC_STUB_LATENCY_MS, otp: str = KYC_STUB_OTP):
+        self.latency = latency_ms / 1000
+        self.otp = otp
+        self._references = itertools.count(10000000)
+
+    async def post(self, path: str, payload: Dict) -> Tuple[int, Dict]:
+        if self.latency:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency)
+        if path.endswith("/otp"):
+            return 200, {"data": {"reference_id": next(self._references), "message": "OTP sent successfully"}}
+        if payload.get("otp") != self.otp:
+            return 200, {"data": {"status": "INVALID", "message": "Invalid OTP"}}
+        return 200, {"data": {
+            "status": "VALID",
+            "name": "Test Youth",
+            "gender": "F",
+            "date_of_birth": "01-01-2004",
+            "address": {"state": "Maharashtra", "district": "Mumbai", "pincode": 400001},
+        }}
+
+    async def aclose(self):
+        pass
+
+
+class KYCClient:
+    def __init__(self, backend, max_retries: int = KYC_MAX_RETRIES, backoff_base: float = 0.25, backoff_max: float = 2.0):
+        self.backend = backend
+        self.breaker = CircuitBreaker()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._stats = {"calls": 0, "retries": 0, "failures": 0, "rejected": 0}
+
+    async def send_otp(self, aadhaar_number: str) -> Dict:
+        return await self._call("/kyc/aadhaar/okyc/otp", {
+            "@entity": "in.co.sandbox.kyc.aadhaar.okyc.otp.request",
+            "aadhaar_number": aadhaar_number,
+            "consent": "y",
+            "reason": "for kyc"
+        }, "Failed to send OTP")
+
+    async def verify_otp(self, reference_id: str, otp: str) -> Dict:
+        return await self._call("/kyc/aadhaar/okyc/otp/verify", {
+            "@entity": "in.co.sandbox.kyc.aadhaar.okyc.request",
+            "reference_id": str(reference_id),
+            "otp": str(otp)
+        }, "OTP verification failed")
+
+    async def _call(self, path: str, payload: Dict, error_message: str) -> Dict:
+        """The response's "data" object; raises KYCRequestFailed or KYCUnavailable."""
+        try:
+            self.breaker.before_call()
+        except KYCUnavailable:
+            self._stats["rejected"] += 1
+            raise
+        self._stats["calls"] += 1
+
+        try:
+            status_code, body, error = await self._post_with_retries(path, payload)
+        except asyncio.CancelledError:
+            # The caller went away, which says nothing about the upstream;
+            # only free a half-open trial so it is not left hanging
+            self.breaker.release_trial()
+            raise
+        except BaseException:
+            self.breaker.record_failure()
+            raise
+
+        if error is not None or (status_code is not None and status_code >= 500) or status_code == 429:
+            self.breaker.record_failure()
+            self._stats["failures"] += 1
+        else:
+            self.breaker.record_success()
+
+        if error is not None:
+            raise KYCUnavailable(f"KYC service unavailable: {type(error).__name__}")
+        if status_code != 200:
+            raise KYCRequestFailed(status_code, body.get("message") or error_message)
+        return body.get("data", {})
+
+    async def _post_with_retries(self, path: str, payload: Dict):
+        attempt = 0
+        while True:
+            try:
+                status_code, body = await self.backend.post(path, payload)
+                error = None
+            except httpx.RequestError as e:
+                status_code, body, error = None, {}, e
+
+            retryable = isinstance(error, RETRYABLE_ERRORS) or status_code in RETRYABLE_STATUS_CODES
+            if not retryable or attempt >= self.max_retries:
+                return status_code, body, error
+            attempt += 1
+            self._stats["retries"] += 1
+            await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "backend": type(self.backend).__name__,
+            "http2": HTTP2_AVAILABLE,
+            "breaker": self.breaker.stats(),
+        }
+
+    async def aclose(self):
+        await self.backend.aclose()
+
+
+kyc_client = KYCClient(StubBackend() if KYC_BACKEND == "stub" else SandboxBackend())
@@ -0,0 +1,119 @@
+"""Stored Aadhaar OTP verification outcomes, for idempotent retries.
+
+Each verify-otp attempt that gets a definite answer from the upstream
+(VALID, INVALID, or a 4xx error) is recorded in kyc_verifications. The
+row stores the parsed name/address payload and is keyed by a digest of
+(reference_id, otp). A retry within KYC_REPLAY_WINDOW_SECONDS gets the
+stored outcome back without calling the upstream. So does any later
+attempt on a reference_id that already verified. Concurrent duplicates
+in one process share a single upstream call through SingleFlight. The
+unique otp_digest makes a second process's duplicate lose at insert
+time and replay the winner's row. An attempt retried after the window
+goes to the upstream again and its new outcome replaces the stored row.
+Transport errors and 5xx responses are not stored, so those retries
+reach the upstream again.
+"""
+import asyncio
+import hashlib
+import os
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+
+KYC_REPLAY_WINDOW_SECONDS = int(os.getenv("KYC_REPLAY_WINDOW_SECONDS", "900"))
+
+Verification = models.KYCVerification
+
+
+class SingleFlight:
+    """Callers with the same key while a call is running share its result."""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def run(self, key: str, fn: Callable[[], Awaitable]):
+        while key in self._calls:
+            future = self._calls[key]
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader's request was cancelled; take over
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a call with no followers does not log "never retrieved"
+            future.exception()
+            raise
+        finally:
+            del self._calls[key]
+
+
+def otp_digest(reference_id: str, otp: str) -> str:
+    return hashlib.sha256(f"{reference_id}:{otp}".encode()).hexdigest()
+
+
+async def find_replay(db: AsyncSession, reference_id: str, digest: str) -> Optional[Verification]:
+    """The stored outcome a retry should get, preferring a successful verification.
+
+    A verified reference_id always replays; other outcomes only within the window.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=KYC_REPLAY_WINDOW_SECONDS)
+    return await db.scalar(
+        select(Verification)
+        .where(
+            Verification.reference_id == reference_id,
+            or_(
+                Verification.status == "valid",
+                and_(Verification.otp_digest == digest, Verification.created_at >= cutoff)
+            )
+        )
+        .order_by((Verification.status == "valid").desc())
+        .limit(1)
+    )
+
+
+async def find_by_digest(db: AsyncSession, digest: str) -> Optional[Verification]:
+    return await db.scalar(select(Verification).where(Verification.otp_digest == digest))
+
+
+async def record(
+    db: AsyncSession,
+    youth_id: int,
+    reference_id: str,
+    digest: str,
+    status: str,
+    data: Optional[Dict] = None,
+    http_status: Optional[int] = None,
+    message: Optional[str] = None
+) -> Verification:
+    """Add an outcome to db's transaction; committed together with the youth update.
+
+    An expired row for the same attempt is overwritten, since otp_digest is unique.
+    """
+    row = await find_by_digest(db, digest)
+    if row is None:
+        row = Verification(otp_digest=digest)
+        db.add(row)
+    row.reference_id = reference_id
+    row.youth_id = youth_id
+    row.status = status
+    row.http_status = http_status
+    row.message = message[:255] if message else None
+    row.data = data
+    row.created_at = datetime.utcnow()
+    return row
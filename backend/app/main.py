@@ -1,3 +1,4 @@
+import asyncio
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -7,8 +8,16 @@ load_dotenv(dotenv_path=env_path)
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import init_db
-from .routers import scout, streamline, amplify, thrive, dashboard, whatsapp, auth, user_portal, ai_agent, upload, kyc
+from .database import init_db, async_engine, pool_metrics
+from . import status_counts
+from .cache import response_cache
+from .principal_cache import principal_cache
+from .password_hashing import password_hasher
+from .kyc_client import kyc_client
+from .engagement_log import engagement_log
+from . import document_store
+from .messaging import outbox
+from .routers import scout, streamline, amplify, thrive, dashboard, whatsapp, auth, user_portal, ai_agent, upload, documents, kyc
 
 app = FastAPI(
     title="PathFinder AI",
@@ -35,6 +44,7 @@ app.add_middleware(
 app.include_router(auth.router)
 app.include_router(user_portal.router)
 app.include_router(upload.router)
+app.include_router(documents.router)
 app.include_router(kyc.router)
 app.include_router(ai_agent.router)
 app.include_router(dashboard.router)
@@ -50,6 +60,26 @@ def on_startup():
     init_db()
 
 
+@app.on_event("startup")
+async def start_background_jobs():
+    app.state.background_jobs = [
+        asyncio.create_task(status_counts.run_periodic_reconciliation()),
+        asyncio.create_task(engagement_log.run_periodic_flush()),
+        asyncio.create_task(document_store.run_periodic_gc()),
+    ]
+    app.state.outbox_workers = outbox.start_workers(whatsapp.dispatcher)
+
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    await outbox.stop_workers(getattr(app.state, "outbox_workers", []))
+    for task in getattr(app.state, "background_jobs", []):
+        task.cancel()
+    await asyncio.to_thread(engagement_log.flush)
+    await kyc_client.aclose()
+    await async_engine.dispose()
+
+
 @app.get("/")
 def root():
     return {
@@ -63,3 +93,23 @@ def root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics/cache")
+def cache_metrics():
+    return {**response_cache.stats(), "principals": principal_cache.stats()}
+
+
+@app.get("/metrics/db-pool")
+def db_pool_metrics():
+    return pool_metrics()
+
+
+@app.get("/metrics/password-hashing")
+def password_hashing_metrics():
+    return password_hasher.stats()
+
+
+@app.get("/metrics/kyc")
+def kyc_metrics():
+    return kyc_client.stats()
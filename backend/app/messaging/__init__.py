@@ -0,0 +1 @@
+# Outbound messaging for WhatsApp campaigns
@@ -0,0 +1,80 @@
+"""Campaign audiences as composable youth filters.
+
+A segment is a function returning a SQL condition on Youth. Conditions
+combine freely, and the same list drives both a COUNT preview and the
+send query. iter_audience selects only (id, name, phone), plus any
+columns a template needs, and streams them with yield_per, so very large
+audiences never turn into ORM objects.
+"""
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..analytics import HIGH_POTENTIAL_SCORE, HIGH_RISK_SCORE
+
+Youth = models.Youth
+
+AUDIENCE_CHUNK_SIZE = 1000
+
+
+def high_potential(min_score: float = HIGH_POTENTIAL_SCORE):
+    return Youth.scout_score >= min_score
+
+
+def enrolled():
+    return Youth.onboarding_status == models.OnboardingStatusEnum.ENROLLED.value
+
+
+def at_risk(min_risk: float = HIGH_RISK_SCORE):
+    return and_(enrolled(), Youth.dropout_risk >= min_risk)
+
+
+def in_location(location: str):
+    return Youth.location == location
+
+
+SEGMENTS: Dict[str, Callable] = {
+    "high_potential": high_potential,
+    "at_risk": at_risk,
+    "enrolled": enrolled,
+}
+
+
+def audience_filters(segment: Optional[str] = None, location: Optional[str] = None) -> List:
+    """Conditions for a named segment (None or "all" for everyone) and an optional location."""
+    filters = []
+    if segment and segment != "all":
+        if segment not in SEGMENTS:
+            raise ValueError(f"Invalid segment. Must be one of: {['all', *SEGMENTS]}")
+        filters.append(SEGMENTS[segment]())
+    if location:
+        filters.append(in_location(location))
+    return filters
+
+
+def count_audience(db: Session, filters: List) -> int:
+    return db.scalar(select(func.count(Youth.id)).where(*filters))
+
+
+def iter_audience_chunks(
+    db: Session,
+    filters: List,
+    columns: Iterable[str] = (),
+    chunk_size: int = AUDIENCE_CHUNK_SIZE
+) -> Iterator[List]:
+    """Yield lists of (id, name, phone, *columns) rows in id order, chunk_size at a time."""
+    extra = [getattr(Youth, c) for c in dict.fromkeys(columns) if c not in ("id", "name", "phone")]
+    result = db.execute(
+        select(Youth.id, Youth.name, Youth.phone, *extra)
+        .where(*filters)
+        .order_by(Youth.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    yield from result.partitions()
+
+
+def iter_audience(db: Session, filters: List, chunk_size: int = AUDIENCE_CHUNK_SIZE) -> Iterator:
+    for rows in iter_audience_chunks(db, filters, chunk_size=chunk_size):
+        yield from rows
@@ -0,0 +1,180 @@
+"""Concurrent, rate-limited message dispatch.
+
+MessageDispatcher sends through a backend (Twilio or the simulator) from a
+bounded pool of workers. Every attempt first takes a token from a shared
+token bucket, so the aggregate send rate never exceeds the configured
+messages per second. The blocking backend call runs in the dispatcher's
+own thread pool, off the event loop. Throttling (429) and server errors
+(5xx) are retried with exponential backoff and full jitter.
+"""
+import asyncio
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TransientSendError(Exception):
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+@dataclass
+class DispatchResult:
+    to: str
+    status: str
+    sid: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 1
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of blocking under a lock."""
+
+    def __init__(self, rate_per_sec: float, capacity: Optional[float] = None):
+        self.rate = rate_per_sec
+        self.capacity = capacity or max(1.0, rate_per_sec)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return how long to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class TwilioBackend:
+    status = "queued"
+
+    def __init__(self, client, from_: str):
+        self.client = client
+        self.from_ = from_
+
+    def send(self, to: str, body: str) -> str:
+        try:
+            return self.client.messages.create(from_=self.from_, to=to, body=body).sid
+        except Exception as e:
+            status = getattr(e, "status", None)
+            if status in RETRYABLE_STATUS_CODES:
+                raise TransientSendError(str(e), status_code=status)
+            raise
+
+
+class SimulatedBackend:
+    """Stands in for Twilio locally; latency and failure rates make it usable for load tests."""
+    status = "simulated"
+
+    def __init__(self, latency_ms: float = 0, failure_rate: float = 0.0, throttle_rate: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self._counter = itertools.count(1)
+
+    def send(self, to: str, body: str) -> str:
+        if self.latency:
+            time.sleep(random.uniform(0.5, 1.5) * self.latency)
+        roll = random.random()
+        if roll < self.throttle_rate:
+            raise TransientSendError("Simulated 429 Too Many Requests", status_code=429)
+        if roll < self.throttle_rate + self.failure_rate:
+            raise RuntimeError("Simulated delivery failure")
+        return f"SIM_{datetime.now().strftime('%Y%m%d%H%M%S')}_{next(self._counter)}"
+
+
+class MessageDispatcher:
+    def __init__(
+        self,
+        backend,
+        rate_per_sec: float,
+        max_concurrency: int = 8,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0
+    ):
+        self.backend = backend
+        self.bucket = TokenBucket(rate_per_sec)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="wa-send")
+        self._stats = {"sent": 0, "failed": 0, "retries": 0, "in_flight": 0}
+        self._stats_lock = threading.Lock()
+
+    async def send(self, to: str, body: str) -> DispatchResult:
+        loop = asyncio.get_running_loop()
+        self._count("in_flight", 1)
+        try:
+            for attempt in range(1, self.max_retries + 2):
+                await self.bucket.acquire()
+                try:
+                    sid = await loop.run_in_executor(self._executor, self.backend.send, to, body)
+                    self._count("sent", 1)
+                    return DispatchResult(to=to, status=self.backend.status, sid=sid, attempts=attempt)
+                except TransientSendError as e:
+                    if attempt > self.max_retries:
+                        self._count("failed", 1)
+                        return DispatchResult(to=to, status="failed", error=str(e), attempts=attempt)
+                    self._count("retries", 1)
+                    delay = e.retry_after or random.uniform(
+                        0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+                    )
+                    await asyncio.sleep(delay)
+                except Exception as e:
+                    self._count("failed", 1)
+                    return DispatchResult(to=to, status="failed", error=str(e), attempts=attempt)
+        finally:
+            self._count("in_flight", -1)
+
+    async def dispatch(self, messages: Iterable[Tuple[str, str]]) -> List[DispatchResult]:
+        """Send (to, body) pairs concurrently; results keep the input order."""
+        messages = list(messages)
+        results: List[Optional[DispatchResult]] = [None] * len(messages)
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in enumerate(messages):
+            queue.put_nowait(item)
+
+        async def worker():
+            while True:
+                try:
+                    index, (to, body) = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                results[index] = await self.send(to, body)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.max_concurrency, len(messages)))))
+        return results
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                **self._stats,
+                "backend": type(self.backend).__name__,
+                "rate_per_sec": self.bucket.rate,
+                "max_concurrency": self.max_concurrency
+            }
+
+    def _count(self, key: str, delta: int):
+        with self._stats_lock:
+            self._stats[key] += delta
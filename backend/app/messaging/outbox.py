@@ -0,0 +1,222 @@
+"""Durable outbox for WhatsApp campaigns.
+
+POST /whatsapp/campaign only writes one message_outbox row per recipient
+and returns. Background workers claim pending rows in batches, send them
+through the dispatcher and record each outcome, so progress survives a
+restart. A claim is an UPDATE that stamps the rows with a random token.
+It is safe with several workers or processes. On graceful shutdown the
+workers finish their current batch before exiting. After a crash, rows
+left in "sending" go back to pending once OUTBOX_CLAIM_TIMEOUT_SECONDS
+has passed, so only that one batch can be sent twice.
+"""
+import asyncio
+import os
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from .. import models
+
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "2"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+OUTBOX_CLAIM_TIMEOUT_SECONDS = int(os.getenv("OUTBOX_CLAIM_TIMEOUT_SECONDS", "120"))
+OUTBOX_SHUTDOWN_GRACE_SECONDS = float(os.getenv("OUTBOX_SHUTDOWN_GRACE_SECONDS", "20"))
+ENQUEUE_CHUNK_SIZE = 1000
+COST_PER_MESSAGE = 0.5
+
+Outbox = models.MessageOutbox
+Campaign = models.MessageCampaign
+
+_stop_requested = False
+
+
+def enqueue_campaign(
+    db: Session,
+    name: str,
+    recipients: Iterable[Tuple[int, str, str]],
+    channel: str = "whatsapp"
+) -> models.MessageCampaign:
+    """Persist a campaign and its (youth_id, to, body) messages in one transaction."""
+    campaign = Campaign(name=name, channel=channel, status="queued")
+    db.add(campaign)
+    db.flush()
+
+    total = 0
+    chunk: List[Dict] = []
+    for youth_id, to, body in recipients:
+        chunk.append({"campaign_id": campaign.id, "youth_id": youth_id, "to": to, "body": body})
+        if len(chunk) >= ENQUEUE_CHUNK_SIZE:
+            db.execute(insert(Outbox), chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        db.execute(insert(Outbox), chunk)
+        total += len(chunk)
+
+    campaign.total = total
+    db.commit()
+    db.refresh(campaign)
+    return campaign
+
+
+def claim_batch(batch_size: int = OUTBOX_BATCH_SIZE) -> List:
+    token = uuid.uuid4().hex
+    db = SessionLocal()
+    try:
+        pending = select(Outbox.id).where(Outbox.status == "pending")\
+            .order_by(Outbox.id).limit(batch_size).scalar_subquery()
+        claimed = db.execute(
+            update(Outbox)
+            .where(Outbox.id.in_(pending), Outbox.status == "pending")
+            .values(status="sending", claimed_by=token, claimed_at=datetime.utcnow(),
+                    attempts=Outbox.attempts + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            db.rollback()
+            return []
+
+        rows = db.execute(
+            select(Outbox.id, Outbox.campaign_id, Outbox.youth_id, Outbox.to, Outbox.body, Campaign.name)
+            .join(Campaign, Campaign.id == Outbox.campaign_id)
+            .where(Outbox.claimed_by == token)
+            .order_by(Outbox.id)
+        ).all()
+        db.execute(
+            update(Campaign)
+            .where(Campaign.id.in_({r.campaign_id for r in rows}), Campaign.status == "queued")
+            .values(status="sending")
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return rows
+    finally:
+        db.close()
+
+
+def record_results(rows: List, results: List):
+    """Store per-recipient outcomes and complete campaigns with nothing left to send."""
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        db.execute(update(Outbox), [
+            {
+                "id": row.id,
+                "status": "failed" if result.status == "failed" else "sent",
+                "sid": result.sid,
+                "error": result.error[:500] if result.error else None,
+                "sent_at": None if result.status == "failed" else now,
+                "claimed_by": None,
+            }
+            for row, result in zip(rows, results)
+        ])
+        logs = [
+            {"youth_id": row.youth_id, "action": f"campaign_{row.name}", "channel": "whatsapp", "created_at": now}
+            for row in rows if row.youth_id is not None
+        ]
+        if logs:
+            db.execute(insert(models.EngagementLog), logs)
+        for campaign_id in {row.campaign_id for row in rows}:
+            _complete_if_drained(db, campaign_id, now)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _complete_if_drained(db: Session, campaign_id: int, now: datetime):
+    remaining = db.scalar(
+        select(func.count(Outbox.id))
+        .where(Outbox.campaign_id == campaign_id, Outbox.status.in_(["pending", "sending"]))
+    )
+    if remaining:
+        return
+
+    counts = recipient_counts(db, campaign_id)
+    # The status guard lets exactly one worker complete the campaign
+    completed = db.execute(
+        update(Campaign)
+        .where(Campaign.id == campaign_id, Campaign.status != "completed")
+        .values(status="completed", sent=counts["sent"], failed=counts["failed"], completed_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not completed:
+        return
+
+    campaign = db.get(Campaign, campaign_id)
+    db.add(models.ChannelPerformance(
+        channel=campaign.channel,
+        campaign_name=campaign.name,
+        date=now,
+        reach=campaign.total,
+        clicks=0,
+        conversions=0,
+        cost=campaign.total * COST_PER_MESSAGE
+    ))
+    print(f"[Outbox] Campaign {campaign_id} '{campaign.name}' completed: "
+          f"{counts['sent']} sent, {counts['failed']} failed")
+
+
+def recipient_counts(db: Session, campaign_id: int) -> Dict[str, int]:
+    counts = Counter({"pending": 0, "sending": 0, "sent": 0, "failed": 0})
+    counts.update(dict(db.execute(
+        select(Outbox.status, func.count(Outbox.id))
+        .where(Outbox.campaign_id == campaign_id)
+        .group_by(Outbox.status)
+    ).all()))
+    return dict(counts)
+
+
+def release_stale_claims(timeout: int = OUTBOX_CLAIM_TIMEOUT_SECONDS) -> int:
+    db = SessionLocal()
+    try:
+        released = db.execute(
+            update(Outbox)
+            .where(Outbox.status == "sending",
+                   Outbox.claimed_at < datetime.utcnow() - timedelta(seconds=timeout))
+            .values(status="pending", claimed_by=None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if released:
+            print(f"[Outbox] Released {released} stale claims")
+        return released
+    finally:
+        db.close()
+
+
+async def run_outbox_worker(dispatcher, batch_size: int = OUTBOX_BATCH_SIZE, poll_interval: float = OUTBOX_POLL_SECONDS):
+    while not _stop_requested:
+        try:
+            rows = await asyncio.to_thread(claim_batch, batch_size)
+            if not rows:
+                await asyncio.to_thread(release_stale_claims)
+                await asyncio.sleep(poll_interval)
+                continue
+            results = await dispatcher.dispatch((row.to, row.body) for row in rows)
+            await asyncio.to_thread(record_results, rows, results)
+        except Exception as e:
+            print(f"[Outbox] Worker error: {e}")
+            await asyncio.sleep(poll_interval)
+
+
+def start_workers(dispatcher, count: int = OUTBOX_WORKERS) -> List[asyncio.Task]:
+    global _stop_requested
+    _stop_requested = False
+    return [asyncio.create_task(run_outbox_worker(dispatcher)) for _ in range(count)]
+
+
+async def stop_workers(tasks: List[asyncio.Task], grace: float = OUTBOX_SHUTDOWN_GRACE_SECONDS):
+    """Let workers finish their current batch; cancel whatever is still running after grace."""
+    global _stop_requested
+    _stop_requested = True
+    if not tasks:
+        return
+    _, still_running = await asyncio.wait(tasks, timeout=grace)
+    for task in still_running:
+        task.cancel()
@@ -0,0 +1,139 @@
+"""Message templates compiled once and rendered in batches.
+
+Templates use str.format placeholders ("Hi {name}"). compile_template
+parses a template into literal and placeholder segments once, and rejects
+placeholders outside the allowed fields up front. Rendering a batch only
+joins segments. Within one render_batch call, results are memoized by
+the tuple of placeholder values, so recipients who share them (the same
+first name and city, say) reuse one string. Nothing rendered outlives
+the call, so no personalised text stays in the cached templates.
+"""
+import functools
+from string import Formatter
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+DEFAULT_LANGUAGE = "en"
+
+# Placeholders a template may use, mapped to the Youth column they read.
+# {name} is the first name, as in all existing templates.
+YOUTH_FIELDS = {
+    "name": "name",
+    "full_name": "name",
+    "location": "location",
+    "age": "age",
+    "education_level": "education_level",
+    "source_channel": "source_channel",
+    "scout_score": "scout_score",
+    "dropout_risk": "dropout_risk",
+    "onboarding_status": "onboarding_status",
+}
+
+
+class TemplateError(ValueError):
+    pass
+
+
+class CompiledTemplate:
+    def __init__(self, text: str, segments: List[Tuple[str, Optional[str], str]]):
+        self.text = text
+        self.segments = segments
+        self.fields: Tuple[str, ...] = tuple(dict.fromkeys(f for _, f, _ in segments if f is not None))
+        # Rendered text of a template without placeholders, with {{ and }} unescaped
+        self.static_text = "".join(literal for literal, _, _ in segments)
+
+    def render(self, context: Mapping) -> str:
+        return self.render_batch([context])[0]
+
+    def render_batch(self, contexts: Iterable[Mapping]) -> List[str]:
+        if not self.fields:
+            return [self.static_text for _ in contexts]
+
+        memo: Dict[tuple, str] = {}
+        rendered = []
+        for context in contexts:
+            key = tuple(context.get(f) for f in self.fields)
+            text = memo.get(key)
+            if text is None:
+                text = memo[key] = self._join(dict(zip(self.fields, key)))
+            rendered.append(text)
+        return rendered
+
+    def _join(self, values: Mapping) -> str:
+        parts = []
+        for literal, field, spec in self.segments:
+            parts.append(literal)
+            if field is not None:
+                value = values[field]
+                if value is None:
+                    parts.append("")
+                elif spec:
+                    try:
+                        parts.append(format(value, spec))
+                    except (TypeError, ValueError):
+                        parts.append(str(value))
+                else:
+                    parts.append(str(value))
+        return "".join(parts)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(text: str, allowed: Optional[FrozenSet[str]]) -> CompiledTemplate:
+    try:
+        parsed = list(Formatter().parse(text))
+    except ValueError as e:
+        raise TemplateError(f"Invalid template: {e}. Use {{{{ and }}}} for literal braces")
+
+    segments = []
+    unknown = []
+    for literal, field, spec, conversion in parsed:
+        if field is not None:
+            if conversion or not field.isidentifier():
+                raise TemplateError(f"Unsupported placeholder: {{{field}}}")
+            if allowed is not None and field not in allowed:
+                unknown.append(field)
+        segments.append((literal, field, spec or ""))
+
+    if unknown:
+        raise TemplateError(
+            f"Unknown placeholders: {', '.join('{' + f + '}' for f in dict.fromkeys(unknown))}. "
+            f"Allowed: {', '.join('{' + f + '}' for f in sorted(allowed))}"
+        )
+    return CompiledTemplate(text, segments)
+
+
+def compile_template(text: str, allowed: Optional[Iterable[str]] = None) -> CompiledTemplate:
+    """Parse a template once; identical (text, allowed) pairs share the compiled result."""
+    return _compile(text, frozenset(allowed) if allowed is not None else None)
+
+
+def youth_context(youth, extra: Optional[Mapping] = None) -> Dict:
+    """Placeholder values for a Youth object or a row with Youth column names."""
+    context = {
+        field: getattr(youth, column, None) for field, column in YOUTH_FIELDS.items()
+        if hasattr(youth, column)
+    }
+    if context.get("name"):
+        context["name"] = context["name"].split()[0]
+    if extra:
+        context.update(extra)
+    return context
+
+
+class TemplateSet:
+    """Named templates with language variants, compiled at import time."""
+
+    def __init__(self, templates: Mapping[str, Mapping[str, str]], allowed: Optional[Iterable[str]] = None):
+        self.compiled = {
+            key: {language: compile_template(text, allowed) for language, text in variants.items()}
+            for key, variants in templates.items()
+        }
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.compiled
+
+    def get(self, key: str, language: str = DEFAULT_LANGUAGE) -> CompiledTemplate:
+        variants = self.compiled[key]
+        return variants.get(language) or variants[DEFAULT_LANGUAGE]
+
+    def languages(self, key: str) -> List[str]:
+        return list(self.compiled[key])
@@ -2,7 +2,7 @@ import numpy as np
 import pickle
 import os
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 try:
@@ -12,6 +12,12 @@ except ImportError:
     LIGHTGBM_AVAILABLE = False
     print("[ML] LightGBM not installed - using rule-based fallback")
 
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
 
 MODEL_PATH = Path(__file__).parent / "trained_model.pkl"
 
@@ -41,6 +47,33 @@ FEATURE_WEIGHTS = {
     "notification_responsive": 10,
 }
 
+# Column order of the batch feature matrix; names match extract_features().
+FEATURE_NAMES = [
+    "age", "age_bucket_18_22", "age_bucket_22_25", "age_bucket_25_plus",
+    "edu_10th", "edu_12th", "edu_graduate", "edu_diploma", "edu_iti",
+    "channel_whatsapp", "channel_referral", "channel_community", "channel_social",
+    "channel_sms", "channel_school", "channel_self",
+    "income_low", "income_middle_low", "income_middle",
+    "num_skills", "has_skills", "num_interests", "has_interests",
+    "profile_completed", "documents_uploaded",
+    "total_sessions", "avg_session_duration", "total_notifications", "notifications_opened",
+    "notification_open_rate",
+]
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+# Mutually exclusive rule groups, first match wins (same order as _predict_rule_based).
+RULE_GROUPS = [
+    [("age_bucket_18_22", "age_18_22"), ("age_bucket_22_25", "age_22_25")],
+    [("edu_graduate", "education_graduate"), ("edu_diploma", "education_diploma"),
+     ("edu_iti", "education_iti"), ("edu_12th", "education_12th"), ("edu_10th", "education_10th")],
+    [("channel_referral", "channel_referral"), ("channel_community", "channel_community_event"),
+     ("channel_whatsapp", "channel_whatsapp")],
+    [("income_low", "income_low"), ("income_middle_low", "income_middle_low")],
+    [("has_skills", "has_skills")],
+    [("profile_completed", "profile_complete")],
+    [("documents_uploaded", "documents_uploaded")],
+]
+
 
 class PropensityModel:
     def __init__(self):
@@ -225,6 +258,119 @@ class PropensityModel:
             "factors": factors
         }
     
+    def extract_features_batch(self, records: Any) -> np.ndarray:
+        """Build the (n, len(FEATURE_NAMES)) feature matrix for a batch of youth records.
+
+        ``records`` may be a list of dicts, a pandas DataFrame or a dict of
+        equal-length column arrays.
+        """
+        columns, n = _as_columns(records)
+        matrix = np.zeros((n, len(FEATURE_NAMES)), dtype=np.float64)
+        if n == 0:
+            return matrix
+
+        def put(name, values):
+            matrix[:, FEATURE_INDEX[name]] = values
+
+        age = _numeric_column(columns, "age", n)
+        put("age", age)
+        put("age_bucket_18_22", (age >= 18) & (age <= 22))
+        put("age_bucket_22_25", (age > 22) & (age <= 25))
+        put("age_bucket_25_plus", age > 25)
+
+        education = _text_column(columns, "education_level", n)
+        put("edu_10th", _contains(education, "10th") | _contains(education, "ssc"))
+        put("edu_12th", _contains(education, "12th") | _contains(education, "hsc"))
+        put("edu_graduate", _contains(education, "graduate") | _contains(education, "degree"))
+        put("edu_diploma", _contains(education, "diploma"))
+        put("edu_iti", _contains(education, "iti"))
+
+        channel = _text_column(columns, "source_channel", n)
+        put("channel_whatsapp", _contains(channel, "whatsapp"))
+        put("channel_referral", _contains(channel, "referral"))
+        put("channel_community", _contains(channel, "community"))
+        put("channel_social", _contains(channel, "social"))
+        put("channel_sms", _contains(channel, "sms"))
+        put("channel_school", _contains(channel, "school"))
+        put("channel_self", _contains(channel, "self"))
+
+        income = _text_column(columns, "income_bracket", n)
+        put("income_low", _contains(income, "low") & ~_contains(income, "middle"))
+        put("income_middle_low", _contains(income, "middle-low") | _contains(income, "middle_low"))
+        put("income_middle", income == "middle")
+
+        num_skills = _list_length_column(columns, "skills", n)
+        put("num_skills", num_skills)
+        put("has_skills", num_skills > 0)
+        num_interests = _list_length_column(columns, "interests", n)
+        put("num_interests", num_interests)
+        put("has_interests", num_interests > 0)
+
+        put("profile_completed", _bool_column(columns, "profile_completed", n))
+        put("documents_uploaded", _bool_column(columns, "documents_uploaded", n))
+
+        put("total_sessions", _numeric_column(columns, "total_sessions", n))
+        put("avg_session_duration", _numeric_column(columns, "avg_session_duration", n))
+        total_notifications = _numeric_column(columns, "total_notifications", n)
+        notifications_opened = _numeric_column(columns, "notifications_opened", n)
+        put("total_notifications", total_notifications)
+        put("notifications_opened", notifications_opened)
+        put("notification_open_rate", np.divide(
+            notifications_opened, total_notifications,
+            out=np.zeros(n), where=total_notifications > 0
+        ))
+
+        return matrix
+
+    def predict_propensity_batch(self, records: Any) -> Dict:
+        """Score a whole batch in one pass.
+
+        Returns ``scores`` and ``probabilities`` as arrays aligned with the
+        input rows; per-row factors are only available from predict_propensity().
+        """
+        matrix = self.extract_features_batch(records)
+
+        if self.is_trained and self.model is not None and LIGHTGBM_AVAILABLE and len(matrix):
+            try:
+                return self._predict_batch_with_model(matrix)
+            except Exception as e:
+                print(f"[ML] Batch prediction error: {e}")
+
+        return self._predict_batch_rule_based(matrix)
+
+    def _predict_batch_with_model(self, matrix: np.ndarray) -> Dict:
+        model_matrix = np.zeros((len(matrix), len(self.feature_names)), dtype=np.float64)
+        for i, name in enumerate(self.feature_names):
+            if name in FEATURE_INDEX:
+                model_matrix[:, i] = matrix[:, FEATURE_INDEX[name]]
+
+        probabilities = np.asarray(self.model.predict(model_matrix), dtype=np.float64)
+        return {
+            "scores": np.round(probabilities * 100, 2),
+            "probabilities": np.round(probabilities, 4),
+            "method": "ml_model"
+        }
+
+    def _predict_batch_rule_based(self, matrix: np.ndarray) -> Dict:
+        scores = np.full(len(matrix), 50.0)
+
+        for group in RULE_GROUPS:
+            conditions = [matrix[:, FEATURE_INDEX[feature]] > 0 for feature, _ in group]
+            weights = [FEATURE_WEIGHTS[weight] for _, weight in group]
+            scores += np.select(conditions, weights, default=0)
+
+        scores += np.where(
+            matrix[:, FEATURE_INDEX["notification_open_rate"]] > 0.5,
+            FEATURE_WEIGHTS["notification_responsive"], 0
+        )
+
+        scores = np.clip(scores, 0, 100)
+        return {
+            "scores": np.round(scores, 2),
+            "probabilities": np.round(scores / 100, 4),
+            "method": "rule_based"
+        }
+    
     def _get_important_factors(self, features: Dict) -> List[tuple]:
         factors = []
         if features.get('edu_graduate'):
@@ -307,3 +453,58 @@ def get_propensity_score(youth_data: Dict) -> Dict:
 
 def get_dropout_risk(youth_data: Dict) -> Dict:
     return propensity_model.calculate_dropout_risk(youth_data)
+
+
+def get_propensity_scores(records: Any) -> Dict:
+    return propensity_model.predict_propensity_batch(records)
+
+
+def _as_columns(records: Any):
+    if PANDAS_AVAILABLE and isinstance(records, pd.DataFrame):
+        return {name: records[name].to_numpy() for name in records.columns}, len(records)
+    if isinstance(records, dict):
+        lengths = {len(v) for v in records.values()}
+        if len(lengths) > 1:
+            raise ValueError("All feature columns must have the same length")
+        return records, lengths.pop() if lengths else 0
+    records = list(records)
+    keys = set()
+    for record in records:
+        keys.update(record.keys())
+    return {key: [record.get(key) for record in records] for key in keys}, len(records)
+
+
+def _numeric_column(columns: Dict, name: str, n: int) -> np.ndarray:
+    if name not in columns:
+        return np.zeros(n)
+    values = np.asarray(columns[name], dtype=object)
+    values[np.equal(values, None)] = 0
+    return np.nan_to_num(values.astype(np.float64))
+
+
+def _text_column(columns: Dict, name: str, n: int) -> np.ndarray:
+    if name not in columns:
+        return np.full(n, "")
+    return np.char.lower(np.array(
+        ["" if v is None else str(v) for v in columns[name]], dtype=str
+    ))
+
+
+def _bool_column(columns: Dict, name: str, n: int) -> np.ndarray:
+    if name not in columns:
+        return np.zeros(n, dtype=bool)
+    # NaN marks a missing value in DataFrame input and counts as False.
+    return np.fromiter((v == v and bool(v) for v in columns[name]), dtype=bool, count=n)
+
+
+def _list_length_column(columns: Dict, name: str, n: int) -> np.ndarray:
+    if name not in columns:
+        return np.zeros(n)
+    return np.fromiter(
+        (len(v) if isinstance(v, list) else 0 for v in columns[name]),
+        dtype=np.float64, count=n
+    )
+
+
+def _contains(values: np.ndarray, needle: str) -> np.ndarray:
+    return np.char.find(values, needle) >= 0
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, ForeignKey, JSON, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, ForeignKey, JSON, Boolean, Index
+from sqlalchemy.orm import relationship, column_property
 from sqlalchemy.sql import func
+from datetime import datetime
 from .database import Base
 import enum
 
@@ -50,6 +51,14 @@ class Admin(Base):
 
 class Youth(Base):
     __tablename__ = "youth"
+    # Access paths of the dashboard/pillar analytics endpoints
+    __table_args__ = (
+        Index("ix_youth_status_risk", "onboarding_status", "dropout_risk"),
+        Index("ix_youth_status_channel", "onboarding_status", "source_channel"),
+        Index("ix_youth_status_created", "onboarding_status", "created_at"),
+        Index("ix_youth_location_score", "location", "scout_score"),
+        Index("ix_youth_channel_score", "source_channel", "scout_score"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
@@ -103,7 +112,12 @@ class Youth(Base):
     guardian_phone = Column(String(20))
     
     scout_score = Column(Float, default=0.0)
-    onboarding_status = Column(String(30), default=OnboardingStatusEnum.DISCOVERED.value)
+    # active_history keeps the previous status available at flush time for
+    # the onboarding_status_counts bookkeeping in status_counts.py
+    onboarding_status = column_property(
+        Column(String(30), default=OnboardingStatusEnum.DISCOVERED.value),
+        active_history=True
+    )
     dropout_risk = Column(Float, default=0.0)
     source_channel = Column(String(30), default="self_registration")
     
@@ -120,14 +134,18 @@ class Youth(Base):
     documents_uploaded = Column(Boolean, default=False)
     is_active = Column(Boolean, default=True)
     
-    enrolled_date = Column(DateTime)
-    created_at = Column(DateTime, server_default=func.now())
+    enrolled_date = Column(DateTime, index=True)
+    # Set client-side so SQLite stores one text format that cursors can compare against
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now(), index=True)
     updated_at = Column(DateTime, onupdate=func.now())
 
     interventions = relationship("Intervention", back_populates="youth")
     engagement_logs = relationship("EngagementLog", back_populates="youth")
 
 
+Index("ix_youth_scout_score", Youth.scout_score.desc())
+
+
 class ChannelPerformance(Base):
     __tablename__ = "channel_performance"
 
@@ -195,3 +213,89 @@ class Placement(Base):
     placed_date = Column(DateTime)
     retention_days = Column(Integer, default=0)
     created_at = Column(DateTime, server_default=func.now())
+
+
+class OnboardingStatusCount(Base):
+    __tablename__ = "onboarding_status_counts"
+
+    status = Column(String(30), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    reconciled_at = Column(DateTime)
+
+
+class JobCheckpoint(Base):
+    __tablename__ = "job_checkpoints"
+
+    name = Column(String(50), primary_key=True)
+    last_id = Column(Integer, default=0)
+    processed = Column(Integer, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class MessageCampaign(Base):
+    __tablename__ = "message_campaigns"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False)
+    channel = Column(String(30), default="whatsapp")
+    status = Column(String(20), default="queued")
+    total = Column(Integer, default=0)
+    sent = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    created_at = Column(DateTime, server_default=func.now())
+    completed_at = Column(DateTime)
+
+
+class MessageOutbox(Base):
+    __tablename__ = "message_outbox"
+    __table_args__ = (
+        Index("ix_message_outbox_status_id", "status", "id"),
+        Index("ix_message_outbox_campaign_status", "campaign_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    campaign_id = Column(Integer, ForeignKey("message_campaigns.id"), nullable=False)
+    youth_id = Column(Integer, ForeignKey("youth.id"))
+    to = Column(String(40), nullable=False)
+    body = Column(String(4096), nullable=False)
+    status = Column(String(20), default="pending")
+    attempts = Column(Integer, default=0)
+    sid = Column(String(64))
+    error = Column(String(500))
+    claimed_by = Column(String(40))
+    claimed_at = Column(DateTime)
+    sent_at = Column(DateTime)
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class DocumentBlob(Base):
+    __tablename__ = "document_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    ext = Column(String(10), nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    # Review previews and compressed archival copies of image uploads
+    derivatives_status = Column(String(20), default="pending")
+    preview_path = Column(String(500))
+    archive_path = Column(String(500))
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class KYCVerification(Base):
+    __tablename__ = "kyc_verifications"
+    __table_args__ = (
+        Index("ix_kyc_verifications_reference_status", "reference_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    reference_id = Column(String(64), nullable=False)
+    # One row per (reference_id, OTP) attempt; see app/kyc_results.py
+    otp_digest = Column(String(64), nullable=False, unique=True)
+    youth_id = Column(Integer, ForeignKey("youth.id"), nullable=False)
+    status = Column(String(20), nullable=False)  # valid, invalid, failed
+    http_status = Column(Integer)
+    message = Column(String(255))
+    data = Column(JSON)
+    created_at = Column(DateTime, server_default=func.now())
@@ -0,0 +1,110 @@
+"""bcrypt hashing and verification on a dedicated, bounded thread pool.
+
+Each bcrypt call burns roughly BCRYPT_ROUNDS-dependent CPU time (about
+250ms at 12 rounds). Running them on a small executor keeps that work off
+the event loop and out of the shared request threadpool. Concurrency is
+capped at PASSWORD_HASH_WORKERS. Once PASSWORD_HASH_MAX_QUEUE calls are
+waiting, new ones are rejected with 503 instead of piling up. The bcrypt
+library releases the GIL, so workers run in parallel.
+
+Hashes whose cost differs from BCRYPT_ROUNDS are flagged by
+verify_and_update so login can transparently rehash them.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+# min/max pinned to the default so any other cost counts as needing an update
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS
+)
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._stats = {
+            "queued": 0, "active": 0, "completed": 0, "rejected": 0,
+            "wait_seconds": 0.0, "run_seconds": 0.0,
+        }
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(pwd_context.hash, password))
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await asyncio.wrap_future(self._submit(pwd_context.verify, password, hashed))
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return await asyncio.wrap_future(self._submit(pwd_context.verify_and_update, password, hashed))
+
+    def hash_sync(self, password: str) -> str:
+        """For sync handlers: waits on the pool so CPU use stays bounded."""
+        return self._submit(pwd_context.hash, password).result()
+
+    def verify_sync(self, password: str, hashed: str) -> bool:
+        return self._submit(pwd_context.verify, password, hashed).result()
+
+    def verify_and_update_sync(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return self._submit(pwd_context.verify_and_update, password, hashed).result()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        completed = stats.pop("completed")
+        wait_seconds = stats.pop("wait_seconds")
+        run_seconds = stats.pop("run_seconds")
+        return {
+            **stats,
+            "completed": completed,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "bcrypt_rounds": BCRYPT_ROUNDS,
+            "avg_wait_ms": round(wait_seconds / completed * 1000, 2) if completed else 0.0,
+            "avg_run_ms": round(run_seconds / completed * 1000, 2) if completed else 0.0,
+        }
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self._stats["queued"] >= self.max_queue:
+                self._stats["rejected"] += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many concurrent logins, please retry",
+                    headers={"Retry-After": "1"}
+                )
+            self._stats["queued"] += 1
+        return self._executor.submit(self._run, fn, args, time.perf_counter())
+
+    def _run(self, fn: Callable, args: tuple, submitted: float):
+        started = time.perf_counter()
+        with self._lock:
+            self._stats["queued"] -= 1
+            self._stats["active"] += 1
+            self._stats["wait_seconds"] += started - submitted
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._stats["active"] -= 1
+                self._stats["completed"] += 1
+                self._stats["run_seconds"] += time.perf_counter() - started
+
+
+password_hasher = PasswordHasher()
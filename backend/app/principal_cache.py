@@ -0,0 +1,110 @@
+"""Short-lived cache of authenticated users for get_current_user.
+
+Entries are keyed on (user_type, email) and hold a detached Admin or Youth
+instance, which is never attached to a session. It is only fit for
+read-only identity checks: it can be up to PRINCIPAL_CACHE_TTL seconds
+behind the database. Handlers that modify the user, or make decisions
+on its current state, load the row in their own session with
+``db.get(models.Youth, user.id)``. Committed ORM changes to a cached
+user drop its entry in this process. Set-based UPDATEs on youth call
+``principal_cache.clear()``. Changes made by other processes show up
+within PRINCIPAL_CACHE_TTL seconds.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from . import models
+
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+USER_TYPES = {
+    models.Admin: "admin",
+    models.Youth: "youth",
+}
+
+
+class PrincipalCache:
+    def __init__(self, ttl: int = PRINCIPAL_CACHE_TTL, max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, user_type: str, email: str):
+        key = (user_type, email)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def set(self, user_type: str, email: str, user):
+        with self._lock:
+            self._entries[(user_type, email)] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end((user_type, email))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_type: str, email: str):
+        with self._lock:
+            self._entries.pop((user_type, email), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 4) if total else 0.0
+            }
+
+
+principal_cache = PrincipalCache()
+
+
+_KEYS = "principal_cache_keys"
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_principal_keys(session, flush_context, instances):
+    keys = None
+    for obj in list(session.dirty) + list(session.deleted):
+        user_type = USER_TYPES.get(type(obj))
+        if user_type is None:
+            continue
+        keys = keys if keys is not None else session.info.setdefault(_KEYS, set())
+        keys.add((user_type, obj.email))
+        # Also drop the entry under the old address when the email changes
+        for old_email in inspect(obj).attrs.email.history.deleted:
+            keys.add((user_type, old_email))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_principals(session):
+    for user_type, email in session.info.pop(_KEYS, ()):
+        principal_cache.invalidate(user_type, email)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_principal_keys(session, previous_transaction):
+    session.info.pop(_KEYS, None)
@@ -0,0 +1,178 @@
+"""Bulk rescoring of scout_score and dropout_risk across the youth table.
+
+Run as a CLI after a model retrain:
+
+    python -m app.rescoring --chunk-size 5000
+    python -m app.rescoring --restart   # ignore the saved checkpoint
+
+The table is walked in primary-key order (keyset pagination), each chunk
+is scored in one batch and written back with a single executemany UPDATE.
+The last processed id is committed together with the chunk, so an
+interrupted run resumes where it stopped.
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+from sqlalchemy import select, update
+
+from .database import SessionLocal
+from .cache import response_cache
+from .principal_cache import principal_cache
+from . import models
+from .ml.propensity_model import get_propensity_scores
+from .routers.thrive import calculate_dropout_risk_batch
+
+JOB_NAME = "rescore_youth"
+DEFAULT_CHUNK_SIZE = 2000
+
+# Same inputs as GET /scout/score/{youth_id} and PUT /thrive/update-engagement.
+SCORE_COLUMNS = [
+    models.Youth.id,
+    models.Youth.age,
+    models.Youth.education_level,
+    models.Youth.source_channel,
+    models.Youth.income_bracket,
+    models.Youth.attendance_rate,
+    models.Youth.assignment_completion,
+    models.Youth.sentiment_score,
+]
+
+_run_lock = threading.Lock()
+job_status: Dict = {"running": False}
+
+
+def _column(rows, name: str, default: float) -> np.ndarray:
+    return np.array(
+        [default if getattr(r, name) is None else getattr(r, name) for r in rows],
+        dtype=np.float64
+    )
+
+
+def score_chunk(rows) -> list:
+    scores = get_propensity_scores({
+        "age": [r.age for r in rows],
+        "education_level": [r.education_level for r in rows],
+        "source_channel": [r.source_channel for r in rows],
+        "income_bracket": [r.income_bracket for r in rows],
+    })["scores"]
+
+    risks = calculate_dropout_risk_batch(
+        _column(rows, "attendance_rate", 0.0),
+        _column(rows, "assignment_completion", 0.0),
+        _column(rows, "sentiment_score", 0.5),
+        scores
+    )
+
+    return [
+        {"id": r.id, "scout_score": float(score), "dropout_risk": float(risk)}
+        for r, score, risk in zip(rows, scores, risks)
+    ]
+
+
+def get_checkpoint(db) -> Optional[models.JobCheckpoint]:
+    return db.get(models.JobCheckpoint, JOB_NAME)
+
+
+def rescore_youth(
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    resume: bool = True,
+    on_progress: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    if not _run_lock.acquire(blocking=False):
+        raise RuntimeError("A rescoring run is already in progress")
+
+    try:
+        db = SessionLocal()
+        try:
+            checkpoint = get_checkpoint(db)
+            if checkpoint and not resume:
+                db.delete(checkpoint)
+                db.commit()
+                checkpoint = None
+            last_id = checkpoint.last_id if checkpoint else 0
+            processed = checkpoint.processed if checkpoint else 0
+        finally:
+            db.close()
+
+        resumed_from = last_id
+        run_processed = 0
+        started = time.perf_counter()
+        job_status.update(running=True, error=None, processed=processed, last_id=last_id, rows_per_sec=0.0)
+
+        while True:
+            db = SessionLocal()
+            try:
+                rows = db.execute(
+                    select(*SCORE_COLUMNS)
+                    .where(models.Youth.id > last_id)
+                    .order_by(models.Youth.id)
+                    .limit(chunk_size)
+                ).all()
+                if not rows:
+                    break
+
+                db.execute(update(models.Youth), score_chunk(rows))
+
+                last_id = rows[-1].id
+                processed += len(rows)
+                run_processed += len(rows)
+                db.merge(models.JobCheckpoint(name=JOB_NAME, last_id=last_id, processed=processed))
+                db.commit()
+            finally:
+                db.close()
+            # Bulk UPDATEs bypass the flush-based cache invalidation
+            response_cache.invalidate("youth")
+            principal_cache.clear()
+
+            elapsed = time.perf_counter() - started
+            rate = run_processed / elapsed if elapsed else 0.0
+            job_status.update(processed=processed, last_id=last_id, rows_per_sec=round(rate, 1))
+            print(f"[Rescore] {processed} rows, last id {last_id} ({rate:.0f} rows/sec)")
+            if on_progress:
+                on_progress(dict(job_status))
+
+        db = SessionLocal()
+        try:
+            checkpoint = get_checkpoint(db)
+            if checkpoint:
+                db.delete(checkpoint)
+                db.commit()
+        finally:
+            db.close()
+
+        elapsed = time.perf_counter() - started
+        result = {
+            "processed": processed,
+            "resumed_from_id": resumed_from,
+            "last_id": last_id,
+            "elapsed_seconds": round(elapsed, 2),
+            "rows_per_sec": round(run_processed / elapsed, 1) if elapsed else 0.0
+        }
+        job_status.update(running=False, last_result=result)
+        return result
+    except Exception as e:
+        job_status.update(running=False, error=str(e))
+        raise
+    finally:
+        _run_lock.release()
+
+
+def is_running() -> bool:
+    return _run_lock.locked()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .database import init_db
+
+    parser = argparse.ArgumentParser(description="Rescore scout_score and dropout_risk for all youth")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--restart", action="store_true", help="ignore any saved checkpoint")
+    args = parser.parse_args()
+
+    init_db()
+    summary = rescore_youth(chunk_size=args.chunk_size, resume=not args.restart)
+    print(f"[Rescore] Done: {summary}")
@@ -5,15 +5,16 @@ from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from openai import AzureOpenAI
 from dotenv import load_dotenv
 
 env_path = Path(__file__).resolve().parent.parent.parent / ".env"
 load_dotenv(dotenv_path=env_path)
 
-from ..database import get_db
+from ..database import get_async_db
 from .. import models
+from ..engagement_log import engagement_log
 from .auth import get_current_youth, get_current_user
 
 router = APIRouter(prefix="/ai", tags=["AI Agent"])
@@ -88,8 +89,7 @@ def get_ai_status():
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_agent(
     request: ChatRequest,
-    current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: dict = Depends(get_current_user)
 ):
     if not AI_ENABLED:
         return ChatResponse(
@@ -133,7 +133,7 @@ Current user context:
         suggestions = generate_suggestions(user if user_type == "youth" else None, request.message)
         
         if user_type == "youth":
-            log_interaction(db, user.id, request.message, response_text)
+            log_interaction(user.id, request.message, response_text)
         
         return ChatResponse(response=response_text, suggestions=suggestions)
         
@@ -146,10 +146,7 @@ Current user context:
 
 
 @router.post("/analyze-profile")
-async def analyze_profile(
-    current_youth: models.Youth = Depends(get_current_youth),
-    db: Session = Depends(get_db)
-):
+async def analyze_profile(current_youth: models.Youth = Depends(get_current_youth)):
     if not AI_ENABLED:
         return {"analysis": "AI analysis unavailable", "recommendations": []}
     
@@ -196,8 +193,7 @@ Provide:
 @router.post("/validate-document")
 async def validate_document(
     document_type: str,
-    document_value: str,
-    db: Session = Depends(get_db)
+    document_value: str
 ):
     validations = {
         "aadhar": {
@@ -235,12 +231,12 @@ async def validate_document(
 async def generate_personalized_nudge(
     youth_id: int,
     nudge_type: str = "engagement",
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     if not AI_ENABLED:
         return {"nudge": "Complete your profile to unlock opportunities!", "type": nudge_type}
     
-    youth = db.query(models.Youth).filter(models.Youth.id == youth_id).first()
+    youth = await db.get(models.Youth, youth_id)
     if not youth:
         raise HTTPException(status_code=404, detail="Youth not found")
     
@@ -345,15 +341,5 @@ def calculate_profile_strength(youth: models.Youth) -> dict:
     }
 
 
-def log_interaction(db: Session, youth_id: int, user_message: str, ai_response: str):
-    try:
-        log = models.EngagementLog(
-            youth_id=youth_id,
-            action="ai_chat",
-            channel="web",
-            session_duration=0
-        )
-        db.add(log)
-        db.commit()
-    except:
-        pass
+def log_interaction(youth_id: int, user_message: str, ai_response: str):
+    engagement_log.log(youth_id, "ai_chat", channel="web")
@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import datetime, timedelta
 import math
 from ..database import get_db
-from .. import models
+from ..cache import response_cache
+from .. import models, analytics
 
 router = APIRouter(prefix="/amplify", tags=["AMPLIFY - Channel Optimization"])
 
 
 @router.get("/channel-performance")
+@response_cache.cached("amplify.channel_performance", ttl=120, tags=("youth",))
 def get_channel_performance(db: Session = Depends(get_db)):
     channels = db.query(
         models.Youth.source_channel,
@@ -92,6 +94,7 @@ def get_channel_performance(db: Session = Depends(get_db)):
 
 
 @router.get("/attribution")
+@response_cache.cached("amplify.attribution", ttl=120, tags=("youth",))
 def get_attribution_analysis(db: Session = Depends(get_db)):
     total_enrolled = db.query(models.Youth)\
         .filter(models.Youth.onboarding_status == "enrolled").count()
@@ -167,27 +170,21 @@ def get_budget_recommendation(total_budget: float = 100000, db: Session = Depend
 
 
 @router.get("/trends")
-def get_channel_trends(days: int = 30, db: Session = Depends(get_db)):
+def get_channel_trends(days: int = 30, granularity: str = "day", db: Session = Depends(get_db)):
+    if granularity not in analytics.GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"Invalid granularity. Must be one of: {list(analytics.GRANULARITIES)}")
+    
     today = datetime.utcnow().date()
     start_date = today - timedelta(days=days)
     
-    daily_data = db.query(
-        func.date(models.Youth.created_at).label("date"),
-        models.Youth.source_channel,
-        func.count(models.Youth.id).label("count")
-    ).filter(
-        models.Youth.created_at >= datetime.combine(start_date, datetime.min.time())
-    ).group_by(
-        func.date(models.Youth.created_at),
-        models.Youth.source_channel
-    ).all()
+    counts = analytics.bucket_counts(
+        db, models.Youth.created_at, start=start_date,
+        granularity=granularity, group_by=models.Youth.source_channel
+    )
     
     trends = {}
-    for row in daily_data:
-        date_str = str(row[0])
-        if date_str not in trends:
-            trends[date_str] = {}
-        trends[date_str][row[1]] = row[2]
+    for (bucket, channel), count in sorted(counts.items(), key=lambda item: item[0][0]):
+        trends.setdefault(bucket.isoformat(), {})[channel] = count
     
     return trends
 
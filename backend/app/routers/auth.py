@@ -6,15 +6,18 @@ from pathlib import Path
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 
 env_path = Path(__file__).resolve().parent.parent.parent / ".env"
 load_dotenv(dotenv_path=env_path)
 
-from ..database import get_db
+from ..database import get_db, get_async_db
 from .. import models, schemas
+from ..principal_cache import principal_cache
+from ..password_hashing import password_hasher
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -22,16 +25,36 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY", "pathfinder-secret-key-change-in-produc
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token", auto_error=False)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify_sync(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash_sync(password)
+
+
+def check_password(db: Session, user, password: str) -> bool:
+    """Verify a login and upgrade the stored hash if its bcrypt cost is outdated."""
+    if not user or not user.password_hash:
+        return False
+    valid, new_hash = password_hasher.verify_and_update_sync(password, user.password_hash)
+    if valid and new_hash:
+        user.password_hash = new_hash
+        db.commit()
+    return valid
+
+
+async def check_password_async(db: AsyncSession, user, password: str) -> bool:
+    if not user or not user.password_hash:
+        return False
+    valid, new_hash = await password_hasher.verify_and_update(password, user.password_hash)
+    if valid and new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+    return valid
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -45,7 +68,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -68,13 +91,17 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
     
-    if user_type == "admin":
-        user = db.query(models.Admin).filter(models.Admin.email == email).first()
-    else:
-        user = db.query(models.Youth).filter(models.Youth.email == email).first()
-    
+    user = principal_cache.get(user_type, email)
     if user is None:
-        raise credentials_exception
+        model = models.Admin if user_type == "admin" else models.Youth
+        user = (await db.execute(select(model).where(model.email == email))).scalars().first()
+        
+        if user is None:
+            raise credentials_exception
+        
+        # Detached, so it can be shared; handlers that write reload the row with db.get
+        db.expunge(user)
+        principal_cache.set(user_type, email, user)
     
     return {"user": user, "user_type": user_type}
 
@@ -119,7 +146,7 @@ def admin_signup(admin_data: schemas.AdminCreate, db: Session = Depends(get_db))
 @router.post("/admin/login", response_model=schemas.Token)
 def admin_login(login_data: schemas.AdminLogin, db: Session = Depends(get_db)):
     admin = db.query(models.Admin).filter(models.Admin.email == login_data.email).first()
-    if not admin or not verify_password(login_data.password, admin.password_hash):
+    if not check_password(db, admin, login_data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -185,7 +212,7 @@ def youth_signup(signup_data: schemas.YouthSignup, db: Session = Depends(get_db)
 @router.post("/youth/login", response_model=schemas.Token)
 def youth_login(login_data: schemas.YouthLogin, db: Session = Depends(get_db)):
     youth = db.query(models.Youth).filter(models.Youth.email == login_data.email).first()
-    if not youth or not youth.password_hash or not verify_password(login_data.password, youth.password_hash):
+    if not check_password(db, youth, login_data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -231,10 +258,12 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user)):
 @router.post("/token", response_model=schemas.Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    admin = db.query(models.Admin).filter(models.Admin.email == form_data.username).first()
-    if admin and verify_password(form_data.password, admin.password_hash):
+    admin = (await db.execute(
+        select(models.Admin).where(models.Admin.email == form_data.username)
+    )).scalars().first()
+    if await check_password_async(db, admin, form_data.password):
         access_token = create_access_token(data={"sub": admin.email, "user_type": "admin"})
         return {
             "access_token": access_token,
@@ -244,8 +273,10 @@ async def login_for_access_token(
             "name": admin.name
         }
     
-    youth = db.query(models.Youth).filter(models.Youth.email == form_data.username).first()
-    if youth and youth.password_hash and verify_password(form_data.password, youth.password_hash):
+    youth = (await db.execute(
+        select(models.Youth).where(models.Youth.email == form_data.username)
+    )).scalars().first()
+    if await check_password_async(db, youth, form_data.password):
         access_token = create_access_token(data={"sub": youth.email, "user_type": "youth"})
         return {
             "access_token": access_token,
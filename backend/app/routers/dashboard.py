@@ -2,55 +2,33 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from ..database import get_db
-from .. import models
+from ..cache import response_cache
+from .. import models, analytics, status_counts
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
 @router.get("/stats")
+@response_cache.cached("dashboard.stats", ttl=30, tags=("youth", "placements"))
 def get_dashboard_stats(db: Session = Depends(get_db)):
-    total = db.query(models.Youth).count()
-    enrolled = db.query(models.Youth)\
-        .filter(models.Youth.onboarding_status == "enrolled").count()
-    dropped = db.query(models.Youth)\
-        .filter(models.Youth.onboarding_status == "dropped").count()
+    overview = analytics.youth_overview(db)
+    total = overview["total"]
+    enrolled = overview["enrolled"]
     
-    enrolled_with_dates = db.query(models.Youth)\
-        .filter(
-            models.Youth.onboarding_status == "enrolled",
-            models.Youth.enrolled_date.isnot(None),
-            models.Youth.created_at.isnot(None)
-        ).all()
-    
-    if enrolled_with_dates:
-        total_days = sum(
-            (y.enrolled_date - y.created_at).days 
-            for y in enrolled_with_dates
-        )
-        avg_days = total_days / len(enrolled_with_dates)
-    else:
-        avg_days = 0
-    
-    placements = db.query(models.Placement).count()
-    placement_rate = (placements / enrolled * 100) if enrolled else 0
-    
-    high_risk = db.query(models.Youth)\
-        .filter(
-            models.Youth.onboarding_status == "enrolled",
-            models.Youth.dropout_risk >= 50
-        ).count()
+    placement_rate = (overview["placements"] / enrolled * 100) if enrolled else 0
     
     return {
         "total_candidates": total,
         "enrolled_count": enrolled,
-        "dropout_rate": round((dropped / total * 100) if total else 0, 2),
-        "avg_onboarding_days": round(avg_days, 1),
+        "dropout_rate": round((overview["dropped"] / total * 100) if total else 0, 2),
+        "avg_onboarding_days": round(overview["avg_onboarding_days"], 1),
         "placement_rate": round(placement_rate, 2),
-        "high_risk_count": high_risk
+        "high_risk_count": overview["high_risk"]
     }
 
 
 @router.get("/funnel")
+@response_cache.cached("dashboard.funnel", ttl=30, tags=("youth", "onboarding_status_counts"))
 def get_conversion_funnel(db: Session = Depends(get_db)):
     stages = [
         ("discovered", "Discovered"),
@@ -61,16 +39,17 @@ def get_conversion_funnel(db: Session = Depends(get_db)):
         ("enrolled", "Enrolled")
     ]
     
-    funnel = []
-    for status, label in stages:
-        count = db.query(models.Youth)\
-            .filter(models.Youth.onboarding_status == status).count()
-        funnel.append({"stage": label, "status": status, "count": count})
+    counts = status_counts.get_counts(db)
+    funnel = [
+        {"stage": label, "status": status, "count": counts.get(status, 0)}
+        for status, label in stages
+    ]
     
     return funnel
 
 
 @router.get("/recent-activity")
+@response_cache.cached("dashboard.recent_activity", ttl=15, tags=("youth",))
 def get_recent_activity(limit: int = 10, db: Session = Depends(get_db)):
     recent_youth = db.query(models.Youth)\
         .order_by(models.Youth.created_at.desc())\
@@ -90,28 +69,14 @@ def get_recent_activity(limit: int = 10, db: Session = Depends(get_db)):
 
 
 @router.get("/pillar-summary")
+@response_cache.cached("dashboard.pillar_summary", ttl=30, tags=("youth",))
 def get_pillar_summary(db: Session = Depends(get_db)):
-    total = db.query(models.Youth).count()
-    
-    high_potential = db.query(models.Youth)\
-        .filter(models.Youth.scout_score >= 80).count()
-    
-    enrolled = db.query(models.Youth)\
-        .filter(models.Youth.onboarding_status == "enrolled").count()
-    
-    best_channel = db.query(
-        models.Youth.source_channel,
-        func.count(models.Youth.id).label("count")
-    ).filter(
-        models.Youth.onboarding_status == "enrolled"
-    ).group_by(models.Youth.source_channel)\
-        .order_by(func.count(models.Youth.id).desc()).first()
-    
-    at_risk = db.query(models.Youth)\
-        .filter(
-            models.Youth.onboarding_status == "enrolled",
-            models.Youth.dropout_risk >= 50
-        ).count()
+    overview = analytics.youth_overview(db)
+    total = overview["total"]
+    high_potential = overview["high_potential"]
+    enrolled = overview["enrolled"]
+    at_risk = overview["high_risk"]
+    best_channel = analytics.top_enrolled_channel(db)
     
     return {
         "scout": {
@@ -126,7 +91,7 @@ def get_pillar_summary(db: Session = Depends(get_db)):
         },
         "amplify": {
             "title": "AMPLIFY",
-            "metric": best_channel[0] if best_channel else "N/A",
+            "metric": best_channel or "N/A",
             "description": "top performing channel"
         },
         "thrive": {
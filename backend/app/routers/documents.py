@@ -0,0 +1,194 @@
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import get_async_db
+from .. import models, document_store
+from .auth import get_current_user
+
+router = APIRouter(prefix="/documents", tags=["Documents"])
+
+DOCUMENT_FIELDS = {
+    "aadhar": "aadhar_doc_path",
+    "pan": "pan_doc_path",
+    "bpl": "bpl_doc_path",
+    "photo": "photo_path",
+    "cert_10th": "cert_10th_path",
+    "cert_12th": "cert_12th_path",
+    "cert_graduation": "cert_graduation_path",
+    "cert_other": "cert_other_path",
+}
+VARIANTS = {"original", "preview", "archive"}
+
+# A URL carrying the content hash (?v=<sha>) never changes what it serves,
+# but these are identity documents, so only the reviewer's own browser may
+# keep them. The unversioned URL follows re-uploads and always revalidates.
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def document_url(youth_id: int, doc_type: str, path: Optional[str] = None) -> str:
+    """URL of a youth's document, pinned to its content when path is in the store"""
+    url = f"/documents/{youth_id}/{doc_type}"
+    sha = document_store.blob_sha(path)
+    return f"{url}?v={sha}" if sha else url
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def _not_modified_since(header: Optional[str], mtime: float) -> bool:
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Single "bytes=" range as inclusive (start, end).
+
+    Returns None to serve the whole file (no header, or several ranges),
+    and raises 416 when the range is malformed or outside the file.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    start, _, end = spec.strip().partition("-")
+    try:
+        if start:
+            first = int(start)
+            last = int(end) if end else size - 1
+        else:
+            first = max(size - int(end), 0)
+            last = size - 1
+    except ValueError:
+        first, last = size, -1
+    if first >= size or first > last or first < 0:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return first, min(last, size - 1)
+
+
+async def _send_range(path: str, start: int, end: int):
+    async with await anyio.open_file(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def resolve_document(
+    db: AsyncSession,
+    current_user: dict,
+    youth_id: int,
+    doc_type: str,
+    variant: str
+) -> Tuple[str, Optional[str]]:
+    """Path of the requested file and its content hash (None for legacy uploads)"""
+    if doc_type not in DOCUMENT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Invalid document type. Must be one of: {list(DOCUMENT_FIELDS)}")
+    if variant not in VARIANTS:
+        raise HTTPException(status_code=400, detail=f"Invalid variant. Must be one of: {sorted(VARIANTS)}")
+
+    field_name = DOCUMENT_FIELDS[doc_type]
+    if current_user["user_type"] == "admin":
+        path = await db.scalar(select(getattr(models.Youth, field_name)).where(models.Youth.id == youth_id))
+    elif current_user["user"].id == youth_id:
+        path = getattr(current_user["user"], field_name)
+    else:
+        raise HTTPException(status_code=403, detail="Not allowed to view this document")
+    if not path:
+        raise HTTPException(status_code=404, detail="Document not uploaded")
+
+    sha = document_store.blob_sha(path)
+    if sha is None or variant == "original":
+        return path, sha
+
+    # Fall back to the original while derivatives are pending, or for PDFs
+    blob = await db.get(models.DocumentBlob, sha)
+    derived = getattr(blob, f"{variant}_path", None) if blob is not None else None
+    return (derived, f"{sha}-{variant}") if derived else (path, sha)
+
+
+@router.get("/{youth_id}/{doc_type}")
+async def get_document(
+    youth_id: int,
+    doc_type: str,
+    request: Request,
+    variant: str = "original",
+    v: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Serve a youth's document to admins or to the youth themselves.
+
+    Supports Range, If-Range, If-None-Match and If-Modified-Since. Documents
+    in the content store have the content hash as ETag, so a revalidation
+    never touches the disk; they are cached as immutable only when v names
+    the hash being served.
+    """
+    path, content_id = await resolve_document(db, current_user, youth_id, doc_type, variant)
+
+    headers = {"Accept-Ranges": "bytes"}
+    if content_id is not None:
+        etag = f'"{content_id}"'
+        headers["ETag"] = etag
+        pinned = v is not None and content_id.split("-")[0] == v
+        headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if pinned else REVALIDATE_CACHE_CONTROL
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+    try:
+        stat = await run_in_threadpool(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Document file missing")
+
+    if content_id is None:
+        etag = f'W/"{int(stat.st_mtime)}-{stat.st_size}"'
+        headers["ETag"] = etag
+        headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+    headers["Last-Modified"] = formatdate(stat.st_mtime, usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if _etag_matches(if_none_match, etag.removeprefix("W/")) or (
+        if_none_match is None and _not_modified_since(request.headers.get("if-modified-since"), stat.st_mtime)
+    ):
+        return Response(status_code=304, headers=headers)
+
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    headers["Content-Disposition"] = f'inline; filename="{youth_id}_{doc_type}{os.path.splitext(path)[1]}"'
+
+    byte_range = parse_range(request.headers.get("range"), stat.st_size)
+    if_range = request.headers.get("if-range")
+    # If-Range needs a strong validator: the content-hash ETag, or the exact Last-Modified date
+    strong_etag = etag if content_id is not None else None
+    if byte_range and if_range and if_range != strong_etag and if_range != headers["Last-Modified"]:
+        byte_range = None  # the client's partial copy is stale
+
+    if byte_range is None:
+        return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(_send_range(path, start, end), status_code=206, media_type=media_type, headers=headers)
@@ -1,21 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-import httpx
-import os
-from dotenv import load_dotenv
 
-from ..database import get_db
-from .. import models
+from ..database import get_async_db
+from .. import models, kyc_results
+from ..kyc_client import kyc_client, KYCRequestFailed, KYCUnavailable
 from .auth import get_current_youth
 
-load_dotenv()
-
 router = APIRouter(prefix="/kyc", tags=["KYC Verification"])
 
-SANDBOX_API_BASE = "https://api.sandbox.co.in"
-SANDBOX_API_KEY = os.getenv("SANDBOX_API_KEY", "key_live_127dbc12d8294d4ea054f95acba11732")
-SANDBOX_AUTH_KEY = os.getenv("SANDBOX_AUTH_KEY", "")
+verify_flights = kyc_results.SingleFlight()
 
 
 class AadharOTPRequest(BaseModel):
@@ -27,6 +22,16 @@ class AadharOTPVerifyRequest(BaseModel):
     otp: str
 
 
+async def call_kyc(call, *args):
+    try:
+        return await call(*args)
+    except KYCRequestFailed as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except KYCUnavailable as e:
+        headers = {"Retry-After": str(int(e.retry_after))} if e.retry_after else None
+        raise HTTPException(status_code=503, detail=str(e), headers=headers)
+
+
 @router.post("/aadhaar/send-otp")
 async def send_aadhaar_otp(
     request: AadharOTPRequest,
@@ -35,136 +40,130 @@ async def send_aadhaar_otp(
     if len(request.aadhaar_number) != 12 or not request.aadhaar_number.isdigit():
         raise HTTPException(status_code=400, detail="Invalid Aadhaar number format")
     
+    data = await call_kyc(kyc_client.send_otp, request.aadhaar_number)
+    return {
+        "success": True,
+        "reference_id": data["reference_id"],
+        "message": data["message"]
+    }
+
+
+def verification_response(row: models.KYCVerification, replayed: bool) -> dict:
+    if row.status == "failed":
+        raise HTTPException(status_code=row.http_status, detail=row.message)
+    if row.status == "valid":
+        return {
+            "success": True,
+            "message": "Aadhaar verified successfully",
+            "verified": True,
+            "data": row.data,
+            "replayed": replayed
+        }
+    return {
+        "success": False,
+        "verified": False,
+        "message": "Aadhaar verification failed",
+        "replayed": replayed
+    }
+
+
+async def find_replay(db: AsyncSession, youth_id: int, reference_id: str, digest: str):
+    row = await kyc_results.find_replay(db, reference_id, digest)
+    if row is not None and row.youth_id != youth_id:
+        raise HTTPException(status_code=403, detail="This verification belongs to another user")
+    return row
+
+
+async def verify_upstream(db: AsyncSession, current_youth: models.Youth, request: AadharOTPVerifyRequest, digest: str) -> dict:
+    # A duplicate may have finished between the caller's check and this call
+    row = await find_replay(db, current_youth.id, request.reference_id, digest)
+    if row is not None:
+        return verification_response(row, replayed=True)
+
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{SANDBOX_API_BASE}/kyc/aadhaar/okyc/otp",
-                headers={
-                    "x-api-key": SANDBOX_API_KEY,
-                    "x-api-version": "1.0",
-                    "Authorization": SANDBOX_AUTH_KEY,
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "@entity": "in.co.sandbox.kyc.aadhaar.okyc.otp.request",
-                    "aadhaar_number": request.aadhaar_number,
-                    "consent": "y",
-                    "reason": "for kyc"
-                }
+        data = await call_kyc(kyc_client.verify_otp, request.reference_id, request.otp)
+    except HTTPException as e:
+        # Definite rejections (bad or expired reference, ...) replay; outages and throttling do not
+        if 400 <= e.status_code < 500 and e.status_code != 429:
+            await kyc_results.record(
+                db, current_youth.id, request.reference_id, digest, "failed",
+                http_status=e.status_code, message=e.detail
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return {
-                    "success": True,
-                    "reference_id": result["data"]["reference_id"],
-                    "message": result["data"]["message"]
-                }
-            else:
-                error_data = response.json() if response.text else {}
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=error_data.get("message", "Failed to send OTP")
-                )
-                
-    except httpx.RequestError as e:
-        raise HTTPException(status_code=503, detail=f"KYC service unavailable: {str(e)}")
+            try:
+                await db.commit()
+            except IntegrityError:
+                await db.rollback()
+        raise
+    
+    if data.get("status") == "VALID":
+        youth = await db.get(models.Youth, current_youth.id)
+        
+        youth.aadhar_number = str(request.reference_id)[:12]
+        youth.aadhar_verified = True
+        
+        name_parts = data.get("name", "").split()
+        if len(name_parts) >= 2 and not youth.first_name:
+            youth.first_name = name_parts[0]
+            youth.last_name = " ".join(name_parts[1:])
+            youth.name = data.get("name")
+        
+        if data.get("gender") and not youth.gender:
+            youth.gender = "Male" if data.get("gender") == "M" else "Female"
+        
+        if data.get("date_of_birth"):
+            dob = data.get("date_of_birth")
+            year_of_birth = int(dob.split("-")[-1]) if "-" in dob else data.get("year_of_birth")
+            if year_of_birth and not youth.age:
+                from datetime import datetime
+                current_year = datetime.now().year
+                youth.age = current_year - year_of_birth
+        
+        address = data.get("address", {})
+        if address.get("state") and not youth.state:
+            youth.state = address.get("state")
+        if address.get("district") and not youth.city:
+            youth.city = address.get("district")
+        if address.get("pincode") and not youth.pincode:
+            youth.pincode = str(address.get("pincode"))
+        
+        row = await kyc_results.record(db, youth.id, request.reference_id, digest, "valid", data={
+            "name": data.get("name"),
+            "gender": data.get("gender"),
+            "date_of_birth": data.get("date_of_birth"),
+            "state": address.get("state"),
+            "district": address.get("district"),
+            "pincode": address.get("pincode")
+        })
+    else:
+        row = await kyc_results.record(db, current_youth.id, request.reference_id, digest, "invalid")
+    
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Another process stored this attempt first; answer with its outcome
+        await db.rollback()
+        row = await kyc_results.find_by_digest(db, digest)
+        if row is None:
+            raise
+        if row.youth_id != current_youth.id:
+            raise HTTPException(status_code=403, detail="This verification belongs to another user")
+        return verification_response(row, replayed=True)
+    return verification_response(row, replayed=False)
 
 
 @router.post("/aadhaar/verify-otp")
 async def verify_aadhaar_otp(
     request: AadharOTPVerifyRequest,
     current_youth: models.Youth = Depends(get_current_youth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    print(f"[KYC] Verifying OTP - reference_id: {request.reference_id}, otp: {request.otp}")
+    """Verify an Aadhaar OTP; retries of the same attempt replay the stored outcome"""
+    digest = kyc_results.otp_digest(request.reference_id, request.otp)
+    row = await find_replay(db, current_youth.id, request.reference_id, digest)
+    if row is not None:
+        return verification_response(row, replayed=True)
     
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            payload = {
-                "@entity": "in.co.sandbox.kyc.aadhaar.okyc.request",
-                "reference_id": str(request.reference_id),
-                "otp": str(request.otp)
-            }
-            print(f"[KYC] Sending to Sandbox: {payload}")
-            
-            response = await client.post(
-                f"{SANDBOX_API_BASE}/kyc/aadhaar/okyc/otp/verify",
-                headers={
-                    "x-api-key": SANDBOX_API_KEY,
-                    "x-api-version": "1.0",
-                    "Authorization": SANDBOX_AUTH_KEY,
-                    "Content-Type": "application/json"
-                },
-                json=payload
-            )
-            
-            print(f"[KYC] Sandbox response status: {response.status_code}")
-            print(f"[KYC] Sandbox response body: {response.text}")
-            
-            if response.status_code == 200:
-                result = response.json()
-                data = result.get("data", {})
-                
-                if data.get("status") == "VALID":
-                    youth = db.query(models.Youth).filter(models.Youth.id == current_youth.id).first()
-                    
-                    youth.aadhar_number = str(request.reference_id)[:12]
-                    youth.aadhar_verified = True
-                    
-                    name_parts = data.get("name", "").split()
-                    if len(name_parts) >= 2 and not youth.first_name:
-                        youth.first_name = name_parts[0]
-                        youth.last_name = " ".join(name_parts[1:])
-                        youth.name = data.get("name")
-                    
-                    if data.get("gender") and not youth.gender:
-                        youth.gender = "Male" if data.get("gender") == "M" else "Female"
-                    
-                    if data.get("date_of_birth"):
-                        dob = data.get("date_of_birth")
-                        year_of_birth = int(dob.split("-")[-1]) if "-" in dob else data.get("year_of_birth")
-                        if year_of_birth and not youth.age:
-                            from datetime import datetime
-                            current_year = datetime.now().year
-                            youth.age = current_year - year_of_birth
-                    
-                    address = data.get("address", {})
-                    if address.get("state") and not youth.state:
-                        youth.state = address.get("state")
-                    if address.get("district") and not youth.city:
-                        youth.city = address.get("district")
-                    if address.get("pincode") and not youth.pincode:
-                        youth.pincode = str(address.get("pincode"))
-                    
-                    db.commit()
-                    db.refresh(youth)
-                    
-                    return {
-                        "success": True,
-                        "message": "Aadhaar verified successfully",
-                        "verified": True,
-                        "data": {
-                            "name": data.get("name"),
-                            "gender": data.get("gender"),
-                            "date_of_birth": data.get("date_of_birth"),
-                            "state": address.get("state"),
-                            "district": address.get("district"),
-                            "pincode": address.get("pincode")
-                        }
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "verified": False,
-                        "message": "Aadhaar verification failed"
-                    }
-            else:
-                error_data = response.json() if response.text else {}
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=error_data.get("message", "OTP verification failed")
-                )
-                
-    except httpx.RequestError as e:
-        raise HTTPException(status_code=503, detail=f"KYC service unavailable: {str(e)}")
+    return await verify_flights.run(
+        f"{current_youth.id}:{digest}",
+        lambda: verify_upstream(db, current_youth, request, digest)
+    )
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from sqlalchemy import func, and_, or_
+from typing import List, Optional, Union
 from ..database import get_db
+from ..cache import response_cache
 from .. import models, schemas
+from ..pagination import encode_cursor, decode_cursor
+from ..export import export_youth
 from ..ml.propensity_model import get_propensity_score, get_dropout_risk
+from .. import rescoring
+from .auth import get_current_admin
 
 router = APIRouter(prefix="/scout", tags=["SCOUT - Predictive Targeting"])
 
@@ -14,18 +19,53 @@ def calculate_scout_score(youth_data: dict) -> float:
     return result["score"]
 
 
-@router.get("/candidates", response_model=List[schemas.Youth])
+@router.get("/candidates", response_model=Union[schemas.YouthPage, List[schemas.Youth]])
 def get_candidates(
     skip: int = 0,
     limit: int = 50,
     min_score: float = 0,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    candidates = db.query(models.Youth)\
-        .filter(models.Youth.scout_score >= min_score)\
-        .order_by(models.Youth.scout_score.desc())\
-        .offset(skip).limit(limit).all()
-    return candidates
+    """List candidates by score. Pass cursor (empty for the first page) to
+    get keyset-paginated pages with a next_cursor instead of skip/limit."""
+    query = db.query(models.Youth)\
+        .filter(models.Youth.scout_score >= min_score)
+    
+    if cursor is None:
+        return query.order_by(models.Youth.scout_score.desc())\
+            .offset(skip).limit(limit).all()
+    
+    if cursor:
+        last_score, last_id = decode_cursor(cursor, float, int)
+        query = query.filter(or_(
+            models.Youth.scout_score < last_score,
+            and_(models.Youth.scout_score == last_score, models.Youth.id < last_id)
+        ))
+    
+    candidates = query.order_by(models.Youth.scout_score.desc(), models.Youth.id.desc())\
+        .limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(candidates) > limit:
+        candidates = candidates[:limit]
+        next_cursor = encode_cursor(candidates[-1].scout_score, candidates[-1].id)
+    
+    return {"items": candidates, "next_cursor": next_cursor}
+
+
+@router.get("/candidates/export")
+def export_candidates(
+    min_score: float = 0,
+    format: str = "csv"
+):
+    """Stream every candidate matching the list filters as CSV or NDJSON"""
+    return export_youth(
+        filters=[models.Youth.scout_score >= min_score],
+        order_by=[models.Youth.scout_score.desc(), models.Youth.id.desc()],
+        fmt=format,
+        filename="candidates"
+    )
 
 
 @router.get("/candidates/{youth_id}", response_model=schemas.YouthDetail)
@@ -71,7 +111,39 @@ def recalculate_score(youth_id: int, db: Session = Depends(get_db)):
     return {"youth_id": youth_id, "scout_score": new_score}
 
 
+@router.post("/rescore")
+def start_bulk_rescore(
+    background_tasks: BackgroundTasks,
+    chunk_size: int = rescoring.DEFAULT_CHUNK_SIZE,
+    restart: bool = False,
+    admin: models.Admin = Depends(get_current_admin)
+):
+    """Rescore scout_score and dropout_risk for every youth in the background"""
+    if rescoring.is_running():
+        raise HTTPException(status_code=409, detail="A rescoring run is already in progress")
+    
+    background_tasks.add_task(rescoring.rescore_youth, chunk_size=chunk_size, resume=not restart)
+    return {"message": "Rescoring started", "chunk_size": chunk_size, "resume": not restart}
+
+
+@router.get("/rescore/status")
+def get_bulk_rescore_status(
+    admin: models.Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    checkpoint = rescoring.get_checkpoint(db)
+    return {
+        **rescoring.job_status,
+        "checkpoint": {
+            "last_id": checkpoint.last_id,
+            "processed": checkpoint.processed,
+            "updated_at": checkpoint.updated_at
+        } if checkpoint else None
+    }
+
+
 @router.get("/segments")
+@response_cache.cached("scout.segments", ttl=60, tags=("youth",))
 def get_segments(db: Session = Depends(get_db)):
     total = db.query(models.Youth).count()
     high = db.query(models.Youth).filter(models.Youth.scout_score >= 80).count()
@@ -90,6 +162,7 @@ def get_segments(db: Session = Depends(get_db)):
 
 
 @router.get("/zone-analysis")
+@response_cache.cached("scout.zone_analysis", ttl=60, tags=("youth",))
 def get_zone_analysis(db: Session = Depends(get_db)):
     zones = db.query(
         models.Youth.location,
@@ -1,10 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
-from datetime import datetime
+from sqlalchemy import func, and_, or_, select, update
+from typing import Dict, List, Optional, Union
+from collections import Counter
+from datetime import date, datetime, timedelta
 from ..database import get_db
-from .. import models, schemas
+from .. import models, schemas, analytics, status_counts
+from ..cache import response_cache
+from ..principal_cache import principal_cache
+from ..pagination import encode_cursor, decode_cursor
+from ..export import export_youth
+from .auth import get_current_admin
 
 router = APIRouter(prefix="/streamline", tags=["STREAMLINE - Automated Onboarding"])
 
@@ -13,30 +19,78 @@ ONBOARDING_STEPS = [
     "documents_submitted", "verified", "enrolled"
 ]
 
+# Forward order of OnboardingStatusEnum; "dropped" is reachable from any of these
+STATUS_PROGRESSION = [
+    s.value for s in models.OnboardingStatusEnum if s != models.OnboardingStatusEnum.DROPPED
+]
+DROPPED = models.OnboardingStatusEnum.DROPPED.value
+BATCH_CHUNK_SIZE = 500
+
+
+def is_valid_transition(current: Optional[str], target: str) -> bool:
+    current = current or models.OnboardingStatusEnum.DISCOVERED.value
+    if current == DROPPED:
+        return False
+    if target == DROPPED:
+        return True
+    if current not in STATUS_PROGRESSION:
+        return False
+    return STATUS_PROGRESSION.index(target) > STATUS_PROGRESSION.index(current)
+
 
 @router.get("/pipeline")
 def get_onboarding_pipeline(db: Session = Depends(get_db)):
-    pipeline = {}
-    for status in models.OnboardingStatusEnum:
-        count = db.query(models.Youth)\
-            .filter(models.Youth.onboarding_status == status.value).count()
-        pipeline[status.value] = count
-    
-    return pipeline
+    counts = status_counts.get_counts(db)
+    return {
+        status.value: counts.get(status.value, 0)
+        for status in models.OnboardingStatusEnum
+    }
 
 
-@router.get("/candidates/{status}", response_model=List[schemas.YouthDetail])
+@router.get("/candidates/{status}", response_model=Union[schemas.YouthDetailPage, List[schemas.YouthDetail]])
 def get_candidates_by_status(
     status: str,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    candidates = db.query(models.Youth)\
-        .filter(models.Youth.onboarding_status == status)\
-        .order_by(models.Youth.created_at.desc())\
-        .offset(skip).limit(limit).all()
-    return candidates
+    """List candidates in a status, newest first. Pass cursor (empty for the
+    first page) to get keyset-paginated pages with a next_cursor."""
+    query = db.query(models.Youth)\
+        .filter(models.Youth.onboarding_status == status)
+    
+    if cursor is None:
+        return query.order_by(models.Youth.created_at.desc())\
+            .offset(skip).limit(limit).all()
+    
+    if cursor:
+        last_created_at, last_id = decode_cursor(cursor, datetime, int)
+        query = query.filter(or_(
+            models.Youth.created_at < last_created_at,
+            and_(models.Youth.created_at == last_created_at, models.Youth.id < last_id)
+        ))
+    
+    candidates = query.order_by(models.Youth.created_at.desc(), models.Youth.id.desc())\
+        .limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(candidates) > limit:
+        candidates = candidates[:limit]
+        next_cursor = encode_cursor(candidates[-1].created_at, candidates[-1].id)
+    
+    return {"items": candidates, "next_cursor": next_cursor}
+
+
+@router.get("/candidates/{status}/export")
+def export_candidates_by_status(status: str, format: str = "csv"):
+    """Stream every candidate in a status as CSV or NDJSON"""
+    return export_youth(
+        filters=[models.Youth.onboarding_status == status],
+        order_by=[models.Youth.created_at.desc(), models.Youth.id.desc()],
+        fmt=format,
+        filename=f"candidates_{status}"
+    )
 
 
 @router.get("/candidates/detail/{youth_id}", response_model=schemas.YouthDetail)
@@ -75,28 +129,85 @@ def update_onboarding_status(
     return {"youth_id": youth_id, "status": new_status}
 
 
+@router.post("/candidates/status", response_model=schemas.BatchStatusResponse)
+def batch_update_onboarding_status(
+    request: schemas.BatchStatusUpdate,
+    admin: models.Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Move many candidates to one status; statuses only move forward, or to dropped.
+
+    Each chunk of ids is read once and then updated with one UPDATE per
+    current status, guarded on that status. A candidate whose status
+    changed in between is reported as "conflict" instead of being
+    overwritten.
+    """
+    target = request.status.value
+    youth_ids = list(dict.fromkeys(request.youth_ids))
+    results: Dict[int, schemas.StatusTransitionResult] = {}
+    deltas = Counter()
+    now = datetime.utcnow()
+    values = {"onboarding_status": target}
+    if target == models.OnboardingStatusEnum.ENROLLED.value:
+        values["enrolled_date"] = now
+
+    for start in range(0, len(youth_ids), BATCH_CHUNK_SIZE):
+        chunk = youth_ids[start:start + BATCH_CHUNK_SIZE]
+        current = dict(db.execute(
+            select(models.Youth.id, models.Youth.onboarding_status).where(models.Youth.id.in_(chunk))
+        ).all())
+
+        movable: Dict[Optional[str], List[int]] = {}
+        for youth_id in chunk:
+            if youth_id not in current:
+                outcome = "not_found"
+            elif current[youth_id] == target:
+                outcome = "unchanged"
+            elif is_valid_transition(current[youth_id], target):
+                movable.setdefault(current[youth_id], []).append(youth_id)
+                outcome = "conflict"  # until the UPDATE confirms it
+            else:
+                outcome = "invalid_transition"
+            results[youth_id] = schemas.StatusTransitionResult(
+                youth_id=youth_id, outcome=outcome, previous_status=current.get(youth_id)
+            )
+
+        for previous, ids in movable.items():
+            status_matches = models.Youth.onboarding_status.is_(None) if previous is None \
+                else models.Youth.onboarding_status == previous
+            updated_ids = db.scalars(
+                update(models.Youth)
+                .where(models.Youth.id.in_(ids), status_matches)
+                .values(**values)
+                .returning(models.Youth.id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            for youth_id in updated_ids:
+                results[youth_id].outcome = "updated"
+            if previous is not None:
+                deltas[previous] -= len(updated_ids)
+            deltas[target] += len(updated_ids)
+
+    # Set-based UPDATEs bypass the flush hooks that keep these in sync
+    status_counts.apply_deltas(db.connection(), deltas)
+    db.commit()
+    response_cache.invalidate("youth", "onboarding_status_counts")
+    principal_cache.clear()
+
+    return {
+        "status": target,
+        "requested": len(youth_ids),
+        "updated": sum(1 for r in results.values() if r.outcome == "updated"),
+        "results": list(results.values())
+    }
+
+
 @router.get("/metrics")
 def get_onboarding_metrics(db: Session = Depends(get_db)):
-    total = db.query(models.Youth).count()
-    enrolled = db.query(models.Youth)\
-        .filter(models.Youth.onboarding_status == "enrolled").count()
-    dropped = db.query(models.Youth)\
-        .filter(models.Youth.onboarding_status == "dropped").count()
-    
-    enrolled_with_dates = db.query(models.Youth)\
-        .filter(
-            models.Youth.onboarding_status == "enrolled",
-            models.Youth.enrolled_date.isnot(None)
-        ).all()
-    
-    if enrolled_with_dates:
-        total_days = sum(
-            (y.enrolled_date - y.created_at).days 
-            for y in enrolled_with_dates
-        )
-        avg_days = total_days / len(enrolled_with_dates)
-    else:
-        avg_days = 0
+    overview = analytics.youth_overview(db)
+    total = overview["total"]
+    enrolled = overview["enrolled"]
+    dropped = overview["dropped"]
     
     return {
         "total_candidates": total,
@@ -105,40 +216,25 @@ def get_onboarding_metrics(db: Session = Depends(get_db)):
         "in_progress": total - enrolled - dropped,
         "enrollment_rate": (enrolled / total * 100) if total else 0,
         "dropout_rate": (dropped / total * 100) if total else 0,
-        "avg_onboarding_days": round(avg_days, 1)
+        "avg_onboarding_days": round(overview["avg_onboarding_days"], 1)
     }
 
 
 @router.get("/daily-progress")
-def get_daily_progress(days: int = 7, db: Session = Depends(get_db)):
-    from datetime import timedelta
-    
-    progress = []
-    today = datetime.utcnow().date()
-    
-    for i in range(days):
-        date = today - timedelta(days=i)
-        next_date = date + timedelta(days=1)
-        
-        enrolled = db.query(models.Youth)\
-            .filter(
-                models.Youth.enrolled_date >= datetime.combine(date, datetime.min.time()),
-                models.Youth.enrolled_date < datetime.combine(next_date, datetime.min.time())
-            ).count()
-        
-        new_candidates = db.query(models.Youth)\
-            .filter(
-                models.Youth.created_at >= datetime.combine(date, datetime.min.time()),
-                models.Youth.created_at < datetime.combine(next_date, datetime.min.time())
-            ).count()
-        
-        progress.append({
-            "date": date.isoformat(),
-            "new_candidates": new_candidates,
-            "enrolled": enrolled
-        })
-    
-    return progress[::-1]
+def get_daily_progress(
+    days: int = 7,
+    granularity: str = "day",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    if granularity not in analytics.GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"Invalid granularity. Must be one of: {list(analytics.GRANULARITIES)}")
+    
+    end_date = end_date or datetime.utcnow().date()
+    start_date = start_date or end_date - timedelta(days=days - 1)
+    
+    return analytics.youth_time_series(db, start_date, end_date, granularity)
 
 
 @router.post("/simulate-whatsapp-onboarding")
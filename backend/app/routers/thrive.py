@@ -3,7 +3,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List
 from datetime import datetime
+import numpy as np
 from ..database import get_db
+from ..cache import response_cache
 from .. import models, schemas
 
 router = APIRouter(prefix="/thrive", tags=["THRIVE - Retention & Placement"])
@@ -41,6 +43,20 @@ def calculate_dropout_risk(youth: models.Youth) -> tuple:
     return min(100, risk_score), risk_factors
 
 
+def calculate_dropout_risk_batch(
+    attendance_rate: np.ndarray,
+    assignment_completion: np.ndarray,
+    sentiment_score: np.ndarray,
+    scout_score: np.ndarray
+) -> np.ndarray:
+    """Vectorized calculate_dropout_risk() returning only the risk scores."""
+    risk = np.select([attendance_rate < 0.5, attendance_rate < 0.7], [30, 15], default=0)
+    risk = risk + np.select([assignment_completion < 0.5, assignment_completion < 0.7], [25, 10], default=0)
+    risk = risk + np.select([sentiment_score < 0.3, sentiment_score < 0.5], [25, 10], default=0)
+    risk = risk + np.where(scout_score < 50, 10, 0)
+    return np.minimum(100, risk).astype(np.float64)
+
+
 def get_intervention_recommendation(risk_score: float) -> str:
     if risk_score >= 70:
         return "Immediate staff call + family engagement"
@@ -78,6 +94,7 @@ def get_at_risk_youth(
 
 
 @router.get("/risk-distribution")
+@response_cache.cached("thrive.risk_distribution", ttl=60, tags=("youth",))
 def get_risk_distribution(db: Session = Depends(get_db)):
     enrolled = db.query(models.Youth)\
         .filter(models.Youth.onboarding_status == "enrolled").all()
@@ -186,6 +203,7 @@ def get_job_matches(youth_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/placement-metrics")
+@response_cache.cached("thrive.placement_metrics", ttl=60, tags=("placements",))
 def get_placement_metrics(db: Session = Depends(get_db)):
     total_placements = db.query(models.Placement).count()
     successful = db.query(models.Placement)\
@@ -1,29 +1,20 @@
 import os
-import uuid
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
-from .. import models
+from ..database import get_async_db
+from .. import models, document_store
+from ..document_derivatives import build_derivatives
 from .auth import get_current_youth
+from .documents import document_url
 
 router = APIRouter(prefix="/upload", tags=["File Upload"])
 
-# Create uploads directory
-UPLOAD_DIR = Path(__file__).resolve().parent.parent.parent / "uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
-
-# Subdirectories for different document types
-(UPLOAD_DIR / "aadhar").mkdir(exist_ok=True)
-(UPLOAD_DIR / "pan").mkdir(exist_ok=True)
-(UPLOAD_DIR / "bpl").mkdir(exist_ok=True)
-(UPLOAD_DIR / "photo").mkdir(exist_ok=True)
-(UPLOAD_DIR / "certificates").mkdir(exist_ok=True)
-
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".pdf"}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 
@@ -39,114 +30,122 @@ def validate_file(file: UploadFile):
     return ext
 
 
-def save_file(file: UploadFile, subdir: str, youth_id: int) -> str:
-    """Save uploaded file and return the path"""
+def _remove_file(path: Optional[str]):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+async def stage_upload(file: UploadFile) -> document_store.StagedDocument:
+    """Copy the upload into the document store's staging area and hash it"""
     ext = validate_file(file)
-    
-    # Generate unique filename
-    filename = f"{youth_id}_{subdir}_{uuid.uuid4().hex[:8]}{ext}"
-    file_path = UPLOAD_DIR / subdir / filename
-    
-    # Save file
-    with open(file_path, "wb") as f:
-        content = file.file.read()
-        if len(content) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail="File too large. Max 5MB allowed")
-        f.write(content)
-    
-    return str(file_path)
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail="File too large. Max 5MB allowed")
+    try:
+        return await run_in_threadpool(document_store.stage, file.file, ext, MAX_FILE_SIZE)
+    except document_store.DocumentTooLarge:
+        raise HTTPException(status_code=400, detail="File too large. Max 5MB allowed")
+
+
+async def replace_document(
+    db: AsyncSession,
+    youth: models.Youth,
+    field_name: str,
+    file: UploadFile,
+    background_tasks: BackgroundTasks
+) -> Tuple[str, bool]:
+    """Point the youth's document column at the uploaded content.
+
+    Previews are built after the response is sent. Returns the stored path
+    and whether the same content was already stored.
+    """
+    staged = await stage_upload(file)
+    old_path = getattr(youth, field_name)
+    if old_path == str(staged.path):
+        await run_in_threadpool(document_store.discard, staged)
+        return old_path, True
+
+    file_path, duplicate = await document_store.put(db, staged)
+    released = await document_store.release(db, old_path)
+    setattr(youth, field_name, file_path)
+    await db.commit()
+
+    # Files uploaded before the content store are not shared and go right away
+    if not released:
+        await run_in_threadpool(_remove_file, old_path)
+    background_tasks.add_task(build_derivatives, staged.sha256)
+    return file_path, duplicate
 
 
 @router.post("/aadhar")
 async def upload_aadhar(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_youth: models.Youth = Depends(get_current_youth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload Aadhar card document"""
-    youth = db.query(models.Youth).filter(models.Youth.id == current_youth.id).first()
-    
-    # Delete old file if exists
-    if youth.aadhar_doc_path and os.path.exists(youth.aadhar_doc_path):
-        os.remove(youth.aadhar_doc_path)
-    
-    file_path = save_file(file, "aadhar", youth.id)
-    youth.aadhar_doc_path = file_path
-    db.commit()
+    youth = await db.get(models.Youth, current_youth.id)
+    file_path, duplicate = await replace_document(db, youth, "aadhar_doc_path", file, background_tasks)
     
-    return {"message": "Aadhar document uploaded", "path": file_path}
+    return {"message": "Aadhar document uploaded", "path": file_path, "duplicate": duplicate, "url": document_url(youth.id, "aadhar", file_path)}
 
 
 @router.post("/pan")
 async def upload_pan(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_youth: models.Youth = Depends(get_current_youth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload PAN card document"""
-    youth = db.query(models.Youth).filter(models.Youth.id == current_youth.id).first()
+    youth = await db.get(models.Youth, current_youth.id)
+    file_path, duplicate = await replace_document(db, youth, "pan_doc_path", file, background_tasks)
     
-    if youth.pan_doc_path and os.path.exists(youth.pan_doc_path):
-        os.remove(youth.pan_doc_path)
-    
-    file_path = save_file(file, "pan", youth.id)
-    youth.pan_doc_path = file_path
-    db.commit()
-    
-    return {"message": "PAN document uploaded", "path": file_path}
+    return {"message": "PAN document uploaded", "path": file_path, "duplicate": duplicate, "url": document_url(youth.id, "pan", file_path)}
 
 
 @router.post("/bpl")
 async def upload_bpl(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_youth: models.Youth = Depends(get_current_youth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload BPL/Ration card document"""
-    youth = db.query(models.Youth).filter(models.Youth.id == current_youth.id).first()
-    
-    if youth.bpl_doc_path and os.path.exists(youth.bpl_doc_path):
-        os.remove(youth.bpl_doc_path)
+    youth = await db.get(models.Youth, current_youth.id)
+    file_path, duplicate = await replace_document(db, youth, "bpl_doc_path", file, background_tasks)
     
-    file_path = save_file(file, "bpl", youth.id)
-    youth.bpl_doc_path = file_path
-    db.commit()
-    
-    return {"message": "BPL document uploaded", "path": file_path}
+    return {"message": "BPL document uploaded", "path": file_path, "duplicate": duplicate, "url": document_url(youth.id, "bpl", file_path)}
 
 
 @router.post("/photo")
 async def upload_photo(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_youth: models.Youth = Depends(get_current_youth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload passport photo"""
-    youth = db.query(models.Youth).filter(models.Youth.id == current_youth.id).first()
-    
-    if youth.photo_path and os.path.exists(youth.photo_path):
-        os.remove(youth.photo_path)
-    
-    file_path = save_file(file, "photo", youth.id)
-    youth.photo_path = file_path
-    db.commit()
+    youth = await db.get(models.Youth, current_youth.id)
+    file_path, duplicate = await replace_document(db, youth, "photo_path", file, background_tasks)
     
-    return {"message": "Photo uploaded", "path": file_path}
+    return {"message": "Photo uploaded", "path": file_path, "duplicate": duplicate, "url": document_url(youth.id, "photo", file_path)}
 
 
 @router.post("/certificate/{cert_type}")
 async def upload_certificate(
     cert_type: str,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_youth: models.Youth = Depends(get_current_youth),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload education certificate (10th, 12th, graduation, other)"""
     valid_types = ["10th", "12th", "graduation", "other"]
     if cert_type not in valid_types:
         raise HTTPException(status_code=400, detail=f"Invalid cert type. Must be one of: {valid_types}")
     
-    youth = db.query(models.Youth).filter(models.Youth.id == current_youth.id).first()
+    youth = await db.get(models.Youth, current_youth.id)
     
     # Get the appropriate field
     field_map = {
@@ -155,27 +154,15 @@ async def upload_certificate(
         "graduation": "cert_graduation_path",
         "other": "cert_other_path"
     }
-    field_name = field_map[cert_type]
+    file_path, duplicate = await replace_document(db, youth, field_map[cert_type], file, background_tasks)
     
-    # Delete old file if exists
-    old_path = getattr(youth, field_name)
-    if old_path and os.path.exists(old_path):
-        os.remove(old_path)
-    
-    file_path = save_file(file, "certificates", youth.id)
-    setattr(youth, field_name, file_path)
-    db.commit()
-    
-    return {"message": f"{cert_type} certificate uploaded", "path": file_path}
+    return {"message": f"{cert_type} certificate uploaded", "path": file_path, "duplicate": duplicate, "url": document_url(youth.id, f"cert_{cert_type}", file_path)}
 
 
 @router.get("/status")
-async def get_upload_status(
-    current_youth: models.Youth = Depends(get_current_youth),
-    db: Session = Depends(get_db)
-):
+async def get_upload_status(current_youth: models.Youth = Depends(get_current_youth)):
     """Get status of all uploaded documents"""
-    youth = db.query(models.Youth).filter(models.Youth.id == current_youth.id).first()
+    youth = current_youth
     
     return {
         "aadhar": {
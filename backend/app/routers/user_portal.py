@@ -32,7 +32,7 @@ def update_my_profile(
     current_youth: models.Youth = Depends(get_current_youth),
     db: Session = Depends(get_db)
 ):
-    youth = db.query(models.Youth).filter(models.Youth.id == current_youth.id).first()
+    youth = db.get(models.Youth, current_youth.id)
     
     update_data = profile_data.model_dump(exclude_unset=True)
     
@@ -78,7 +78,7 @@ def submit_documents(
     current_youth: models.Youth = Depends(get_current_youth),
     db: Session = Depends(get_db)
 ):
-    youth = db.query(models.Youth).filter(models.Youth.id == current_youth.id).first()
+    youth = db.get(models.Youth, current_youth.id)
     
     # Validate required fields
     errors = []
@@ -1,4 +1,3 @@
-import asyncio
 import json
 import os
 from pathlib import Path
@@ -7,20 +6,32 @@ from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field, field_validator
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 
 env_path = Path(__file__).resolve().parent.parent.parent / ".env"
 load_dotenv(dotenv_path=env_path)
 
-from ..database import get_db
+from ..database import get_db, get_async_db
 from .. import models
+from ..engagement_log import engagement_log
+from ..messaging.dispatcher import MessageDispatcher, SimulatedBackend, TwilioBackend
+from ..messaging import audience, outbox
+from ..messaging.templates import (
+    DEFAULT_LANGUAGE, YOUTH_FIELDS, TemplateError, TemplateSet, compile_template, youth_context
+)
+from ..pagination import encode_cursor, decode_cursor
 
 router = APIRouter(prefix="/whatsapp", tags=["WhatsApp - Messaging"])
 
 TWILIO_ENABLED = False
 twilio_client = None
 WA_FROM = "simulation_mode"
+DEFAULT_RPS = float(os.getenv("DEFAULT_RATE_LIMIT_PER_SEC", "5"))
+MAX_CONCURRENCY = int(os.getenv("WHATSAPP_MAX_CONCURRENCY", "8"))
+MAX_RETRIES = int(os.getenv("WHATSAPP_MAX_RETRIES", "3"))
 
 try:
     from twilio.rest import Client as TwilioClient
@@ -29,7 +40,6 @@ try:
     AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
     WA_FROM = os.getenv("TWILIO_WHATSAPP_FROM", "whatsapp:+14155238886")
     CONTENT_SID = os.getenv("TWILIO_CONTENT_SID")
-    DEFAULT_RPS = float(os.getenv("DEFAULT_RATE_LIMIT_PER_SEC", "5"))
     
     if ACCOUNT_SID and AUTH_TOKEN:
         twilio_client = TwilioClient(ACCOUNT_SID, AUTH_TOKEN)
@@ -40,6 +50,22 @@ try:
 except ImportError:
     print("[WhatsApp] Twilio library not installed - running in SIMULATION mode")
 
+if TWILIO_ENABLED:
+    backend = TwilioBackend(twilio_client, WA_FROM)
+else:
+    backend = SimulatedBackend(
+        latency_ms=float(os.getenv("WHATSAPP_SIMULATED_LATENCY_MS", "0")),
+        failure_rate=float(os.getenv("WHATSAPP_SIMULATED_FAILURE_RATE", "0")),
+        throttle_rate=float(os.getenv("WHATSAPP_SIMULATED_THROTTLE_RATE", "0"))
+    )
+
+dispatcher = MessageDispatcher(
+    backend,
+    rate_per_sec=DEFAULT_RPS,
+    max_concurrency=MAX_CONCURRENCY,
+    max_retries=MAX_RETRIES
+)
+
 
 class Recipient(BaseModel):
     to: str = Field(..., description="WhatsApp number with country code")
@@ -71,12 +97,15 @@ class SendMessageRequest(BaseModel):
 class OnboardingMessageRequest(BaseModel):
     youth_id: int
     message_type: str = Field(..., description="welcome, documents, reminder, enrolled")
+    language: str = Field(default=DEFAULT_LANGUAGE, description="en, hi")
 
 
 class NudgeRequest(BaseModel):
     youth_id: int
     nudge_type: str = Field(default="motivational")
     custom_message: Optional[str] = None
+    language: str = Field(default=DEFAULT_LANGUAGE)
+    variables: Optional[Dict[str, str]] = Field(default=None, description="Overrides for non-youth placeholders")
 
 
 class BulkCampaignRequest(BaseModel):
@@ -101,6 +130,37 @@ class BulkResponse(BaseModel):
     results: List[MessageResult]
 
 
+class CampaignResponse(BaseModel):
+    campaign_id: int
+    campaign_name: str
+    status: str
+    total: int
+    success: int
+    failed: int
+    pending: int
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+
+class CampaignRecipient(BaseModel):
+    id: int
+    youth_id: Optional[int] = None
+    to: str
+    status: str
+    attempts: int
+    sid: Optional[str] = None
+    error: Optional[str] = None
+    sent_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class CampaignRecipientPage(BaseModel):
+    items: List[CampaignRecipient]
+    next_cursor: Optional[str] = None
+
+
 ONBOARDING_TEMPLATES = {
     "welcome": {
         "en": "Welcome to Magic Bus! You've taken the first step towards a brighter future. Reply with your preferred language: 1. English 2. Hindi 3. Marathi",
@@ -127,39 +187,42 @@ NUDGE_TEMPLATES = {
     "job_opportunity": "Hi {name}, we have a new job opportunity that matches your skills: {job_title} at {company}. Interested? Reply YES."
 }
 
+# Values for nudge placeholders that do not come from the youth record
+NUDGE_VARIABLES = {
+    "topic": "interview skills",
+    "missed_days": "2",
+    "milestone": "Week 1",
+    "job_title": "Customer Service",
+    "company": "TCS"
+}
 
-async def send_whatsapp_message(to: str, body: str) -> MessageResult:
+NUDGE_FIELDS = set(YOUTH_FIELDS) | set(NUDGE_VARIABLES)
+
+onboarding_templates = TemplateSet(ONBOARDING_TEMPLATES, allowed=YOUTH_FIELDS)
+nudge_templates = TemplateSet({k: {DEFAULT_LANGUAGE: v} for k, v in NUDGE_TEMPLATES.items()}, allowed=NUDGE_FIELDS)
+
+
+def normalize_whatsapp_number(to: str) -> str:
     if not to.startswith("whatsapp:"):
         to = f"whatsapp:+{to.lstrip('+')}"
-    
-    if not TWILIO_ENABLED:
-        return MessageResult(
-            to=to,
-            status="simulated",
-            sid=f"SIM_{datetime.now().strftime('%Y%m%d%H%M%S')}",
-            error=None
-        )
-    
-    try:
-        msg = twilio_client.messages.create(
-            from_=WA_FROM,
-            to=to,
-            body=body
-        )
-        return MessageResult(to=to, status="queued", sid=msg.sid)
-    except Exception as e:
-        return MessageResult(to=to, status="failed", error=str(e))
+    return to
 
 
-def log_message(db: Session, youth_id: int, action: str, channel: str = "whatsapp"):
-    log = models.EngagementLog(
-        youth_id=youth_id,
-        action=action,
-        channel=channel,
-        created_at=datetime.utcnow()
-    )
-    db.add(log)
-    db.commit()
+def to_message_result(result) -> MessageResult:
+    return MessageResult(to=result.to, status=result.status, sid=result.sid, error=result.error)
+
+
+def summarize(results: List[MessageResult]) -> BulkResponse:
+    success = sum(1 for r in results if r.status in ["queued", "simulated"])
+    return BulkResponse(total=len(results), success=success, failed=len(results) - success, results=results)
+
+
+async def send_whatsapp_message(to: str, body: str) -> MessageResult:
+    return to_message_result(await dispatcher.send(normalize_whatsapp_number(to), body))
+
+
+def log_message(youth_id: int, action: str, channel: str = "whatsapp"):
+    engagement_log.log(youth_id, action, channel=channel)
 
 
 @router.get("/status")
@@ -167,26 +230,27 @@ def get_whatsapp_status():
     return {
         "twilio_enabled": TWILIO_ENABLED,
         "whatsapp_from": WA_FROM if TWILIO_ENABLED else "simulation_mode",
-        "mode": "live" if TWILIO_ENABLED else "simulation"
+        "mode": "live" if TWILIO_ENABLED else "simulation",
+        "dispatcher": dispatcher.stats()
     }
 
 
 @router.post("/send/onboarding", response_model=MessageResult)
 async def send_onboarding_message(
     request: OnboardingMessageRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    youth = db.query(models.Youth).filter(models.Youth.id == request.youth_id).first()
+    youth = await db.get(models.Youth, request.youth_id)
     if not youth:
         raise HTTPException(status_code=404, detail="Youth not found")
     
-    if request.message_type not in ONBOARDING_TEMPLATES:
+    if request.message_type not in onboarding_templates:
         raise HTTPException(status_code=400, detail="Invalid message type")
     
-    template = ONBOARDING_TEMPLATES[request.message_type]["en"]
-    result = await send_whatsapp_message(youth.phone, template)
+    template = onboarding_templates.get(request.message_type, request.language)
+    result = await send_whatsapp_message(youth.phone, template.render(youth_context(youth)))
     
-    log_message(db, youth.id, f"whatsapp_onboarding_{request.message_type}")
+    log_message(youth.id, f"whatsapp_onboarding_{request.message_type}")
     
     return result
 
@@ -194,28 +258,24 @@ async def send_onboarding_message(
 @router.post("/send/nudge", response_model=MessageResult)
 async def send_nudge(
     request: NudgeRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    youth = db.query(models.Youth).filter(models.Youth.id == request.youth_id).first()
+    youth = await db.get(models.Youth, request.youth_id)
     if not youth:
         raise HTTPException(status_code=404, detail="Youth not found")
     
     if request.custom_message:
-        message = request.custom_message
+        template = compile_or_400(request.custom_message, NUDGE_FIELDS)
     else:
-        template = NUDGE_TEMPLATES.get(request.nudge_type, NUDGE_TEMPLATES["motivational"])
-        message = template.format(
-            name=youth.name.split()[0],
-            topic="interview skills",
-            missed_days="2",
-            milestone="Week 1",
-            job_title="Customer Service",
-            company="TCS"
+        template = nudge_templates.get(
+            request.nudge_type if request.nudge_type in nudge_templates else "motivational",
+            request.language
         )
+    message = template.render(youth_context(youth, {**NUDGE_VARIABLES, **(request.variables or {})}))
     
     result = await send_whatsapp_message(youth.phone, message)
     
-    log_message(db, youth.id, f"whatsapp_nudge_{request.nudge_type}")
+    log_message(youth.id, f"whatsapp_nudge_{request.nudge_type}")
     
     intervention = models.Intervention(
         youth_id=youth.id,
@@ -224,83 +284,128 @@ async def send_nudge(
         status="sent"
     )
     db.add(intervention)
-    db.commit()
+    await db.commit()
     
     return result
 
 
 @router.post("/send/bulk", response_model=BulkResponse)
-async def send_bulk_messages(
-    request: SendMessageRequest,
+async def send_bulk_messages(request: SendMessageRequest):
+    results = await dispatcher.dispatch(
+        (normalize_whatsapp_number(recipient), request.body) for recipient in request.recipients
+    )
+    return summarize([to_message_result(r) for r in results])
+
+
+def compile_or_400(text: str, allowed):
+    try:
+        return compile_template(text, allowed)
+    except TemplateError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def resolve_audience(segment: Optional[str], location: Optional[str]) -> list:
+    try:
+        return audience.audience_filters(segment, location)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def campaign_progress(db: Session, campaign: models.MessageCampaign) -> CampaignResponse:
+    counts = outbox.recipient_counts(db, campaign.id)
+    return CampaignResponse(
+        campaign_id=campaign.id,
+        campaign_name=campaign.name,
+        status=campaign.status,
+        total=campaign.total,
+        success=counts["sent"],
+        failed=counts["failed"],
+        pending=counts["pending"] + counts["sending"],
+        created_at=campaign.created_at,
+        completed_at=campaign.completed_at
+    )
+
+
+def render_campaign(db: Session, template, filters: list):
+    """Yield (youth_id, to, body) for the audience, rendering one chunk of rows at a time."""
+    columns = [YOUTH_FIELDS[f] for f in template.fields]
+    for rows in audience.iter_audience_chunks(db, filters, columns):
+        bodies = template.render_batch([youth_context(row) for row in rows])
+        for row, body in zip(rows, bodies):
+            yield row.id, normalize_whatsapp_number(row.phone), body
+
+
+@router.post("/campaign", response_model=CampaignResponse, status_code=202)
+def run_campaign(
+    request: BulkCampaignRequest,
     db: Session = Depends(get_db)
 ):
-    results = []
+    """Queue a campaign in the outbox; poll GET /whatsapp/campaign/{campaign_id} for progress."""
+    template = compile_or_400(request.message_body, YOUTH_FIELDS)
+    filters = resolve_audience(request.target_segment, request.location_filter)
     
-    for recipient in request.recipients:
-        phone = recipient
-        if not phone.startswith("whatsapp:"):
-            phone = f"whatsapp:+{phone.lstrip('+')}"
-        
-        result = await send_whatsapp_message(phone, request.body)
-        results.append(result)
-        await asyncio.sleep(0.2)
+    if not audience.count_audience(db, filters):
+        raise HTTPException(status_code=404, detail="No recipients match the criteria")
     
-    success = sum(1 for r in results if r.status in ["queued", "simulated"])
-    failed = len(results) - success
+    campaign = outbox.enqueue_campaign(
+        db,
+        request.campaign_name,
+        render_campaign(db, template, filters),
+        channel=request.channel
+    )
     
-    return BulkResponse(total=len(results), success=success, failed=failed, results=results)
+    return campaign_progress(db, campaign)
 
 
-@router.post("/campaign", response_model=BulkResponse)
-async def run_campaign(
-    request: BulkCampaignRequest,
+@router.get("/audience/preview")
+def preview_audience(
+    segment: Optional[str] = None,
+    location: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(models.Youth)
-    
-    if request.target_segment == "high_potential":
-        query = query.filter(models.Youth.scout_score >= 80)
-    elif request.target_segment == "at_risk":
-        query = query.filter(
-            models.Youth.onboarding_status == "enrolled",
-            models.Youth.dropout_risk >= 50
-        )
-    elif request.target_segment == "enrolled":
-        query = query.filter(models.Youth.onboarding_status == "enrolled")
-    
-    if request.location_filter:
-        query = query.filter(models.Youth.location == request.location_filter)
-    
-    youth_list = query.all()
+    """How many youth a campaign with this segment and location would reach."""
+    filters = resolve_audience(segment, location)
+    return {
+        "segment": segment or "all",
+        "location": location,
+        "count": audience.count_audience(db, filters)
+    }
+
+
+@router.get("/campaign/{campaign_id}", response_model=CampaignResponse)
+def get_campaign_progress(campaign_id: int, db: Session = Depends(get_db)):
+    campaign = db.get(models.MessageCampaign, campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return campaign_progress(db, campaign)
+
+
+@router.get("/campaign/{campaign_id}/recipients", response_model=CampaignRecipientPage)
+def get_campaign_recipients(
+    campaign_id: int,
+    status: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    if not db.get(models.MessageCampaign, campaign_id):
+        raise HTTPException(status_code=404, detail="Campaign not found")
     
-    if not youth_list:
-        raise HTTPException(status_code=404, detail="No recipients match the criteria")
+    query = db.query(models.MessageOutbox).filter(models.MessageOutbox.campaign_id == campaign_id)
+    if status:
+        query = query.filter(models.MessageOutbox.status == status)
+    if cursor:
+        last_id, = decode_cursor(cursor, int)
+        query = query.filter(models.MessageOutbox.id > last_id)
     
-    results = []
-    for youth in youth_list:
-        personalized_message = request.message_body.replace("{name}", youth.name.split()[0])
-        result = await send_whatsapp_message(youth.phone, personalized_message)
-        results.append(result)
-        
-        log_message(db, youth.id, f"campaign_{request.campaign_name}")
-        await asyncio.sleep(0.2)
+    rows = query.order_by(models.MessageOutbox.id).limit(limit + 1).all()
     
-    success = sum(1 for r in results if r.status in ["queued", "simulated"])
-    failed = len(results) - success
-    
-    campaign_log = models.ChannelPerformance(
-        channel="whatsapp",
-        campaign_name=request.campaign_name,
-        date=datetime.utcnow(),
-        reach=len(results),
-        clicks=0,
-        conversions=0,
-        cost=len(results) * 0.5
-    )
-    db.add(campaign_log)
-    db.commit()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
     
-    return BulkResponse(total=len(results), success=success, failed=failed, results=results)
+    return {"items": rows, "next_cursor": next_cursor}
 
 
 @router.get("/templates")
@@ -311,6 +416,11 @@ def get_message_templates():
         "templates": {
             "onboarding": {k: v["en"] for k, v in ONBOARDING_TEMPLATES.items()},
             "nudges": NUDGE_TEMPLATES
+        },
+        "languages": {k: onboarding_templates.languages(k) for k in ONBOARDING_TEMPLATES},
+        "placeholders": {
+            "campaign": sorted(YOUTH_FIELDS),
+            "nudge": sorted(NUDGE_FIELDS)
         }
     }
 
@@ -322,11 +432,11 @@ async def simulate_onboarding_conversation(
     age: int,
     location: str,
     education: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     from .scout import calculate_scout_score
     
-    existing = db.query(models.Youth).filter(models.Youth.phone == phone).first()
+    existing = (await db.execute(select(models.Youth).where(models.Youth.phone == phone))).scalars().first()
     if existing:
         raise HTTPException(status_code=400, detail="Phone already registered")
     
@@ -396,8 +506,7 @@ async def simulate_onboarding_conversation(
         interests=[]
     )
     db.add(db_youth)
-    db.commit()
-    db.refresh(db_youth)
+    await db.commit()
     
     conversation_flow.append({
         "direction": "outbound",
@@ -405,7 +514,7 @@ async def simulate_onboarding_conversation(
         "timestamp": datetime.utcnow().isoformat()
     })
     
-    log_message(db, db_youth.id, "whatsapp_onboarding_complete")
+    log_message(db_youth.id, "whatsapp_onboarding_complete")
     
     return {
         "youth_id": db_youth.id,
@@ -428,36 +537,15 @@ class MarketingSendRequest(BaseModel):
 
 @router.post("/marketing/send", response_model=BulkResponse)
 async def send_marketing_messages(request: MarketingSendRequest):
-    results = []
+    template = compile_or_400(request.message_template, ["name"])
+    bodies = template.render_batch([{"name": recipient.name or "User"} for recipient in request.recipients])
     
-    for recipient in request.recipients:
+    messages = []
+    for recipient, body in zip(request.recipients, bodies):
         to_number = recipient.to
         if not to_number.startswith("whatsapp:"):
             to_number = f"whatsapp:{to_number}"
-        
-        personalized_message = request.message_template.replace("{name}", recipient.name or "User")
-        
-        if not TWILIO_ENABLED:
-            results.append(MessageResult(
-                to=to_number,
-                status="queued",
-                sid=f"SIM_{datetime.now().strftime('%Y%m%d%H%M%S')}_{len(results)}",
-                error=None
-            ))
-        else:
-            try:
-                msg = twilio_client.messages.create(
-                    from_=WA_FROM,
-                    to=to_number,
-                    body=personalized_message
-                )
-                results.append(MessageResult(to=to_number, status="queued", sid=msg.sid))
-            except Exception as e:
-                results.append(MessageResult(to=to_number, status="failed", error=str(e)))
-        
-        await asyncio.sleep(0.2)
-    
-    success = sum(1 for r in results if r.status == "queued")
-    failed = len(results) - success
-    
-    return BulkResponse(total=len(results), success=success, failed=failed, results=results)
+        messages.append((to_number, body))
+    
+    results = await dispatcher.dispatch(messages)
+    return summarize([to_message_result(r) for r in results])
@@ -223,6 +223,16 @@ class YouthDetail(Youth):
     documents_uploaded: bool = False
 
 
+class YouthPage(BaseModel):
+    items: List[Youth]
+    next_cursor: Optional[str] = None
+
+
+class YouthDetailPage(BaseModel):
+    items: List[YouthDetail]
+    next_cursor: Optional[str] = None
+
+
 class YouthPublicProfile(BaseModel):
     id: int
     first_name: Optional[str] = None
@@ -296,6 +306,24 @@ class OnboardingStep(BaseModel):
     completed_at: Optional[datetime] = None
 
 
+class BatchStatusUpdate(BaseModel):
+    youth_ids: List[int] = Field(..., min_length=1, max_length=10000)
+    status: OnboardingStatus
+
+
+class StatusTransitionResult(BaseModel):
+    youth_id: int
+    outcome: str  # updated, unchanged, not_found, invalid_transition, conflict
+    previous_status: Optional[str] = None
+
+
+class BatchStatusResponse(BaseModel):
+    status: str
+    requested: int
+    updated: int
+    results: List[StatusTransitionResult]
+
+
 class DropoutAlert(BaseModel):
     youth_id: int
     youth_name: str
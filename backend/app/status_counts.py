@@ -0,0 +1,162 @@
+"""Per-status youth counters for the funnel and pipeline endpoints.
+
+onboarding_status_counts holds one row per onboarding status. Every ORM
+flush that inserts, deletes or changes the status of a Youth adjusts the
+affected rows in the same transaction, so the counters commit or roll
+back together with the change. Set-based UPDATEs bypass the flush and
+must call apply_deltas() themselves.
+
+init_db() seeds a row for every OnboardingStatusEnum value, and both
+paths below upsert, so writes that race the first reconcile (or each
+other adding a row) never fail on the primary key. reconcile()
+re-derives the counters from the youth table; it runs at startup and
+then periodically to correct any drift.
+"""
+import asyncio
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Mapping
+
+from sqlalchemy import delete, event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal, upsert_insert
+from . import models
+
+RECONCILE_INTERVAL_SECONDS = int(os.getenv("STATUS_COUNTS_RECONCILE_SECONDS", "600"))
+
+_DELTAS_KEY = "onboarding_status_deltas"
+_DEFAULT_STATUS = models.OnboardingStatusEnum.DISCOVERED.value
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_status_deltas(session, flush_context, instances):
+    deltas = session.info.setdefault(_DELTAS_KEY, Counter())
+
+    for obj in session.new:
+        if isinstance(obj, models.Youth):
+            deltas[obj.onboarding_status or _DEFAULT_STATUS] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, models.Youth):
+            deltas[obj.onboarding_status or _DEFAULT_STATUS] -= 1
+
+    for obj in session.dirty:
+        if isinstance(obj, models.Youth) and obj not in session.deleted:
+            history = inspect(obj).attrs.onboarding_status.history
+            if history.has_changes():
+                for old in history.deleted:
+                    if old is not None:
+                        deltas[old] -= 1
+                for new in history.added:
+                    if new is not None:
+                        deltas[new] += 1
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_status_deltas(session, flush_context):
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_status_deltas(session, previous_transaction):
+    session.info.pop(_DELTAS_KEY, None)
+
+
+def apply_deltas(connection, deltas: Mapping[str, int]):
+    table = models.OnboardingStatusCount.__table__
+    for status, delta in deltas.items():
+        if not delta:
+            continue
+        # Normally an UPDATE; inserts only for a status with no row yet (fixed by reconcile)
+        connection.execute(
+            upsert_insert(connection.dialect.name, table)
+            .values(status=status, count=delta)
+            .on_conflict_do_update(index_elements=[table.c.status], set_={"count": table.c.count + delta})
+        )
+
+
+def seed(connection):
+    """Insert missing counter rows with the current youth counts."""
+    table = models.OnboardingStatusCount.__table__
+    actual = dict(connection.execute(
+        select(models.Youth.onboarding_status, func.count(models.Youth.id))
+        .group_by(models.Youth.onboarding_status)
+    ).all())
+    now = datetime.utcnow()
+    connection.execute(
+        upsert_insert(connection.dialect.name, table).on_conflict_do_nothing(index_elements=[table.c.status]),
+        [
+            {"status": status.value, "count": actual.get(status.value, 0), "reconciled_at": now}
+            for status in models.OnboardingStatusEnum
+        ]
+    )
+
+
+def get_counts(db: Session) -> Dict[str, int]:
+    rows = db.execute(select(
+        models.OnboardingStatusCount.status,
+        models.OnboardingStatusCount.count
+    )).all()
+    if not rows:
+        return reconcile(db)
+    return {status: count for status, count in rows}
+
+
+def reconcile(db: Session) -> Dict[str, int]:
+    actual = {
+        status: count for status, count in db.execute(
+            select(models.Youth.onboarding_status, func.count(models.Youth.id))
+            .group_by(models.Youth.onboarding_status)
+        ).all()
+        if status is not None
+    }
+    for status in models.OnboardingStatusEnum:
+        actual.setdefault(status.value, 0)
+
+    table = models.OnboardingStatusCount.__table__
+    stored = dict(db.execute(select(table.c.status, table.c.count)).all())
+    now = datetime.utcnow()
+    drift = {
+        status: count - stored[status] for status, count in actual.items()
+        if status in stored and stored[status] != count
+    }
+    for status in set(stored) - set(actual):
+        if stored[status]:
+            drift[status] = -stored[status]
+
+    stmt = upsert_insert(db.get_bind().dialect.name, table)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c.status],
+            set_={"count": stmt.excluded.count, "reconciled_at": stmt.excluded.reconciled_at}
+        ),
+        [{"status": status, "count": count, "reconciled_at": now} for status, count in actual.items()]
+    )
+    db.execute(delete(table).where(table.c.status.notin_(list(actual))))
+
+    db.commit()
+
+    if drift:
+        print(f"[StatusCounts] Corrected drift: {drift}")
+    return actual
+
+
+def reconcile_now() -> Dict[str, int]:
+    db = SessionLocal()
+    try:
+        return reconcile(db)
+    finally:
+        db.close()
+
+
+async def run_periodic_reconciliation(interval: int = RECONCILE_INTERVAL_SECONDS):
+    while True:
+        try:
+            await asyncio.to_thread(reconcile_now)
+        except Exception as e:
+            print(f"[StatusCounts] Reconciliation failed: {e}")
+        await asyncio.sleep(interval)
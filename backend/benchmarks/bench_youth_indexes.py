@@ -0,0 +1,137 @@
+"""Query plans and timings of the analytics queries with and without the youth indexes.
+
+    python benchmarks/bench_youth_indexes.py --rows 500000
+
+Builds a throwaway SQLite database with synthetic youth rows, runs each
+query without the analytics indexes (as on databases created before they
+were added), then again after ensure_indexes(), printing the SQLite plan
+and the median time of both runs.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, func, select, text  # noqa: E402
+
+from app.database import Base, ensure_indexes  # noqa: E402
+from app import models  # noqa: E402
+
+Youth = models.Youth
+
+STATUSES = ["discovered", "interested", "documents_pending", "documents_submitted", "verified", "enrolled", "dropped"]
+CHANNELS = ["whatsapp", "sms", "community_event", "social_media", "referral", "school_partnership", "self_registration"]
+CITIES = ["Mumbai", "Delhi", "Bangalore", "Chennai", "Hyderabad", "Pune", "Kolkata", "Ahmedabad", "Jaipur", "Lucknow"]
+
+window_start = datetime.utcnow() - timedelta(days=7)
+
+QUERIES = {
+    "status count": select(func.count()).where(Youth.onboarding_status == "enrolled"),
+    "enrolled high risk": select(func.count()).where(
+        Youth.onboarding_status == "enrolled", Youth.dropout_risk >= 50
+    ),
+    "enrolled by channel": select(Youth.source_channel, func.count())
+        .where(Youth.onboarding_status == "enrolled").group_by(Youth.source_channel),
+    "high potential count": select(func.count()).where(Youth.scout_score >= 80),
+    "top candidates": select(Youth.id).where(Youth.scout_score >= 0)
+        .order_by(Youth.scout_score.desc()).limit(50),
+    "candidates by status": select(Youth.id).where(Youth.onboarding_status == "verified")
+        .order_by(Youth.created_at.desc()).limit(50),
+    "new in last 7 days": select(func.count()).where(Youth.created_at >= window_start),
+    "enrolled in last 7 days": select(func.count()).where(Youth.enrolled_date >= window_start),
+    "zone analysis": select(Youth.location, func.count(), func.avg(Youth.scout_score))
+        .group_by(Youth.location),
+    "channel performance": select(Youth.source_channel, func.count(), func.avg(Youth.scout_score))
+        .group_by(Youth.source_channel),
+}
+
+
+def populate(engine, rows: int):
+    now = datetime.utcnow()
+    batch = []
+    with engine.begin() as conn:
+        for i in range(rows):
+            status = random.choice(STATUSES)
+            created_at = now - timedelta(days=random.randint(0, 365), seconds=random.randint(0, 86400))
+            batch.append({
+                "name": f"Youth {i}",
+                "age": random.randint(18, 25),
+                "gender": random.choice(["Male", "Female"]),
+                "phone": f"9{i:09d}",
+                "location": random.choice(CITIES),
+                "education_level": random.choice(["10th", "12th", "graduate", "diploma", "iti"]),
+                "scout_score": round(random.uniform(0, 100), 2),
+                "dropout_risk": round(random.uniform(0, 100), 2),
+                "onboarding_status": status,
+                "source_channel": random.choice(CHANNELS),
+                "created_at": created_at,
+                "enrolled_date": created_at + timedelta(days=random.randint(5, 30)) if status == "enrolled" else None,
+            })
+            if len(batch) == 10000:
+                conn.execute(Youth.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(Youth.__table__.insert(), batch)
+
+
+def run(engine, repeat: int):
+    results = {}
+    with engine.connect() as conn:
+        for name, query in QUERIES.items():
+            compiled = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))]
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.execute(query).all()
+                timings.append(time.perf_counter() - started)
+            results[name] = (plan, statistics.median(timings) * 1000)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        Base.metadata.create_all(bind=engine)
+        analytics_indexes = [ix for ix in Youth.__table__.indexes if not ix.unique and ix.name != "ix_youth_id"]
+        for index in analytics_indexes:
+            index.drop(bind=engine)
+
+        print(f"Populating {args.rows} youth rows...")
+        populate(engine, args.rows)
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+        before = run(engine, args.repeat)
+
+        ensure_indexes(engine)
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+        after = run(engine, args.repeat)
+
+        for name in QUERIES:
+            plan_before, ms_before = before[name]
+            plan_after, ms_after = after[name]
+            print(f"\n== {name}: {ms_before:.1f} ms -> {ms_after:.1f} ms")
+            print(f"   before: {' | '.join(plan_before)}")
+            print(f"   after:  {' | '.join(plan_after)}")
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,8 @@ import random
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from app.database import SessionLocal, init_db
-from app import models
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app import models, status_counts
+from app.password_hashing import pwd_context
 
 FIRST_NAMES_MALE = ["Rahul", "Vikram", "Amit", "Suresh", "Arjun", "Ravi", "Manjunath", "Karan", "Sanjay", "Ajay", "Rajesh", "Vinod"]
 FIRST_NAMES_FEMALE = ["Priya", "Anita", "Neha", "Pooja", "Kavitha", "Sneha", "Deepika", "Lakshmi", "Divya", "Meera", "Sunita", "Anjali", "Rekha"]
@@ -313,6 +311,8 @@ def seed_database(force: bool = False):
         print("Creating placements...")
         create_placements(db)
         
+        status_counts.reconcile(db)
+        
         print("\n=== Database seeded successfully! ===")
         print(f"Admins: {db.query(models.Admin).count()}")
         print(f"Youth: {db.query(models.Youth).count()}")
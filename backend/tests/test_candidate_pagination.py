@@ -0,0 +1,72 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, normalize_sqlite_datetimes
+from app import models
+from app.routers.streamline import get_candidates_by_status
+
+
+def make_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pagination.db'}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def add_youth(db, n, **fields):
+    db.add(models.Youth(
+        name=f"Youth {n}", age=20, gender="F", phone=f"90000000{n:02d}",
+        location="Mumbai", education_level="12th", onboarding_status="interested", **fields
+    ))
+
+
+def walk_pages(db, limit):
+    ids, cursor = [], ""
+    while cursor is not None:
+        page = get_candidates_by_status("interested", limit=limit, cursor=cursor, db=db)
+        assert len(ids) <= 20, "pagination did not terminate"
+        ids.extend(youth.id for youth in page["items"])
+        cursor = page["next_cursor"]
+    return ids
+
+
+def test_cursor_walks_rows_with_equal_timestamps(tmp_path):
+    db = make_session(tmp_path)
+    created_at = datetime(2024, 1, 1, 10, 0, 0)
+    for n in range(3):
+        add_youth(db, n, created_at=created_at)
+    add_youth(db, 3, created_at=datetime(2024, 1, 1, 10, 0, 0, 500000))
+    db.commit()
+
+    assert walk_pages(db, limit=1) == [4, 3, 2, 1]
+    assert walk_pages(db, limit=3) == [4, 3, 2, 1]
+
+
+def test_cursor_walks_normalized_server_default_timestamps(tmp_path):
+    db = make_session(tmp_path)
+    add_youth(db, 0, created_at=datetime(2024, 1, 1, 10, 0, 0, 500000))
+    db.commit()
+    # Rows written by server_default=func.now() before created_at had a Python default
+    for n in (1, 2):
+        db.execute(text(
+            "INSERT INTO youth (name, age, gender, phone, location, education_level, onboarding_status, created_at) "
+            f"VALUES ('Youth {n}', 20, 'F', '900000000{n}', 'Mumbai', '12th', 'interested', '2024-01-01 10:00:00')"
+        ))
+    db.commit()
+
+    normalize_sqlite_datetimes(db.get_bind())
+
+    assert walk_pages(db, limit=1) == [1, 3, 2]
+
+
+def test_cursor_page_uses_status_created_index(tmp_path):
+    db = make_session(tmp_path)
+    plan = db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM youth WHERE onboarding_status = 'interested' "
+        "AND (created_at < :c OR (created_at = :c AND id < 5)) ORDER BY created_at DESC, id DESC LIMIT 2"
+    ), {"c": "2024-01-01 10:00:00.000000"}).all()
+    details = " ".join(row[-1] for row in plan)
+
+    assert "ix_youth_status_created" in details
+    assert "TEMP B-TREE" not in details
@@ -233,6 +233,18 @@ export default function AmplifyPage() {
         fetchData();
     }, [budget]);
 
+    useEffect(() => {
+        if (!campaignResult || campaignResult.status === 'completed') return;
+        const timer = setTimeout(async () => {
+            try {
+                setCampaignResult(await whatsappAPI.getCampaign(campaignResult.campaign_id));
+            } catch (error) {
+                console.error('Failed to fetch campaign progress:', error);
+            }
+        }, 1000);
+        return () => clearTimeout(timer);
+    }, [campaignResult]);
+
     const handleRunCampaign = async () => {
         if (!campaignForm.name || !campaignForm.message) {
             alert('Please fill in campaign name and message');
@@ -505,7 +517,11 @@ export default function AmplifyPage() {
                             ) : (
                                 <div className="conversation-result">
                                     <div className="result-header">
-                                        <span className="badge badge-success">Campaign Complete</span>
+                                        {campaignResult.status === 'completed' ? (
+                                            <span className="badge badge-success">Campaign Complete</span>
+                                        ) : (
+                                            <span className="badge badge-warning">Sending... {campaignResult.pending} pending</span>
+                                        )}
                                     </div>
                                     <div style={{ padding: '1rem 0' }}>
                                         <div style={{ display: 'grid', gridTemplateColumns: 'repeat(3, 1fr)', gap: '1rem', textAlign: 'center' }}>
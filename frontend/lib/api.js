@@ -94,6 +94,7 @@ export const whatsappAPI = {
                 location_filter: locationFilter
             }),
         }),
+    getCampaign: (campaignId) => fetchAPI(`/whatsapp/campaign/${campaignId}`),
     simulateConversation: (phone, name, age, location, education) =>
         fetchAPI(`/whatsapp/simulate/conversation?phone=${encodeURIComponent(phone)}&name=${encodeURIComponent(name)}&age=${age}&location=${encodeURIComponent(location)}&education=${encodeURIComponent(education)}`, {
             method: 'POST',